@@ -3,10 +3,12 @@ FastAPI server for government scheme RAG system.
 Provides endpoints for CSV ingestion and semantic search.
 """
 
-from fastapi import FastAPI, HTTPException, status, Response
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import asyncio
 import os
 import logging
 from dotenv import load_dotenv
@@ -78,6 +80,10 @@ class QueryResponse(BaseModel):
     matches: List[Dict[str, Any]]
     total_matches: int
 
+class BatchQueryResponse(BaseModel):
+    success: bool
+    results: List[QueryResponse]
+
 class HealthResponse(BaseModel):
     status: str
     index_loaded: bool
@@ -90,6 +96,17 @@ async def startup_event():
         # Try to load existing index
         if rag_system.load_index():
             logger.info("Loaded existing FAISS index")
+
+            # Fire-and-forget warm-up so the first real query does not pay
+            # cold mmap page faults or FAISS kernel initialization
+            async def warmup_search():
+                try:
+                    await asyncio.to_thread(rag_system.search, "warmup", 1)
+                    logger.info("Warm-up search completed")
+                except Exception as e:
+                    logger.warning(f"Warm-up search failed: {str(e)}")
+
+            asyncio.create_task(warmup_search())
         else:
             logger.info("No existing index found. Ready for CSV ingestion.")
     except Exception as e:
@@ -134,9 +151,13 @@ async def get_current_csv():
         csv_path = os.getenv("SCHEMES_CSV")
         if not csv_path or not os.path.exists(csv_path):
             raise HTTPException(status_code=404, detail="SCHEMES_CSV not found")
-        with open(csv_path, "r", encoding="utf-8") as f:
-            data = f.read()
-        return Response(content=data, media_type="text/csv; charset=utf-8")
+        # FileResponse streams from disk (sendfile) instead of reading the
+        # whole file into memory on the event loop thread
+        return FileResponse(
+            csv_path,
+            media_type="text/csv; charset=utf-8",
+            filename=os.path.basename(csv_path)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -172,9 +193,9 @@ async def ingest_csv(request: IngestRequest):
         
         logger.info(f"Processing CSV: {request.csv_path}")
         
-        # Process CSV and create documents
+        # Process CSV and create documents off the event loop thread
         processor = csv_processor.SchemeDocumentProcessor(request.csv_path)
-        documents, metadata = processor.process_schemes()
+        documents, metadata = await asyncio.to_thread(processor.process_schemes)
         
         if not documents:
             raise HTTPException(
@@ -183,7 +204,7 @@ async def ingest_csv(request: IngestRequest):
             )
         
         # Build RAG index
-        success = rag_system.build_index(documents, metadata)
+        success = await rag_system.build_index(documents, metadata)
         
         if not success:
             raise HTTPException(
@@ -236,8 +257,9 @@ async def query_schemes(request: QueryRequest):
                 detail="Query cannot be empty"
             )
         
-        # Search for similar schemes
-        results = rag_system.search(request.question, request.k)
+        # Search for similar schemes; the HF embedding round-trip and FAISS
+        # scan are blocking, so run them on the threadpool
+        results = await asyncio.to_thread(rag_system.search, request.question, request.k)
         
         return QueryResponse(
             success=True,
@@ -255,6 +277,61 @@ async def query_schemes(request: QueryRequest):
             detail=f"Query failed: {str(e)}"
         )
 
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_schemes_batch(requests: List[QueryRequest]):
+    """
+    Query the scheme database with several questions in one request.
+
+    All questions are embedded together and searched with a single batched
+    FAISS call, which is much faster than issuing one /query per question.
+
+    Args:
+        requests: List of QueryRequest objects
+
+    Returns:
+        BatchQueryResponse with one QueryResponse per question
+    """
+    try:
+        # Check if index is loaded
+        if rag_system.index is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No index loaded. Please ingest data first using /ingest endpoint."
+            )
+
+        questions = [r.question.strip() for r in requests]
+        if not questions or any(not q for q in questions):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Queries cannot be empty"
+            )
+
+        # All requests in a batch share the largest requested k
+        k = max(r.k for r in requests)
+        batch_results = await asyncio.to_thread(rag_system.search_batch, questions, k)
+
+        return BatchQueryResponse(
+            success=True,
+            results=[
+                QueryResponse(
+                    success=True,
+                    query=request.question,
+                    matches=matches[:request.k],
+                    total_matches=len(matches[:request.k])
+                )
+                for request, matches in zip(requests, batch_results)
+            ]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error during batch query: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch query failed: {str(e)}"
+        )
+
 @app.get("/stats", response_model=Dict[str, Any])
 async def get_stats():
     """Get statistics about the current index."""
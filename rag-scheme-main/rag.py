@@ -4,12 +4,17 @@ Handles vector storage, similarity search, and document retrieval.
 """
 
 import os
+import asyncio
+import json
 import pickle
 import numpy as np
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 from typing import List, Dict, Any, Tuple, Optional
+from functools import lru_cache
 from pathlib import Path
-from huggingface_hub import InferenceClient
+from huggingface_hub import InferenceClient, AsyncInferenceClient
 from dotenv import load_dotenv
 import logging
 import pandas as pd
@@ -21,79 +26,204 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields surfaced in search results: (result key, metadata key, default)
+RESULT_FIELDS = [
+    ("scheme", "scheme_name", "Unknown"),
+    ("sector", "sector", "Unknown"),
+    ("state", "state", "Unknown"),
+    ("eligibility", "eligibility", "Not specified"),
+    ("benefits", "benefits", "Not specified"),
+    ("official_url", "official_url", "Not available"),
+    ("level", "level", "Unknown"),
+    ("tags", "tags", ""),
+]
+
 class RAGSystem:
     """
     RAG system for government scheme retrieval using Hugging Face embeddings and FAISS.
     """
     
-    def __init__(self, 
+    def __init__(self,
                  index_path: str = "faiss_index",
                  embedding_model: str = "intfloat/multilingual-e5-base",
-                 dimension: int = 768):
+                 dimension: int = 768,
+                 index_factory: Optional[str] = None):
         """
         Initialize the RAG system.
-        
+
         Args:
             index_path: Path to store FAISS index
             embedding_model: Hugging Face embedding model name
             dimension: Embedding dimension (768 for multilingual-e5-base)
+            index_factory: FAISS index factory string (e.g. "HNSW32",
+                "IVF256,Flat", or quantized variants like "HNSW32,SQ8" and
+                "IVF256,PQ96x8" that shrink the per-vector footprint 4-32x).
+                Defaults to FAISS_INDEX_FACTORY env var or "HNSW32".
         """
         self.index_path = Path(index_path)
         self.embedding_model = embedding_model
         self.dimension = dimension
+        self.index_factory = index_factory or os.getenv("FAISS_INDEX_FACTORY", "HNSW32")
         self.index = None
         self.metadata = []
         self.documents = []
+        self._meta_cols = None
         
         # Initialize Hugging Face client
         hf_token = os.getenv("HF_TOKEN")
         if not hf_token:
             raise ValueError("HF_TOKEN not found in environment variables")
         
+        # Set the FAISS OpenMP pool explicitly; the default can be 1 on some
+        # hosts or oversubscribe when uvicorn runs multiple workers (in that
+        # case set FAISS_THREADS to cores/workers).
+        faiss.omp_set_num_threads(int(os.getenv("FAISS_THREADS", os.cpu_count() or 1)))
+
         self.client = InferenceClient(model=embedding_model, token=hf_token)
+        self.async_client = AsyncInferenceClient(model=embedding_model, token=hf_token)
+
+        # Optional on-device embedding; skips the 100-400 ms API round-trip
+        self._local_model = None
+        self._local_tokenizer = None
+        self._st_model = None
+        if os.getenv("EMBED_DEVICE", "").startswith("cuda"):
+            self._init_st_model(os.getenv("EMBED_DEVICE"))
+        elif os.getenv("LOCAL_EMBED"):
+            self._init_local_model()
+
+        # Per-instance LRU so repeated queries skip the HF round-trip entirely
+        self._embed_query_cached = lru_cache(maxsize=10000)(self._embed_query_bytes)
+
         logger.info(f"Initialized RAG system with model: {embedding_model}")
     
-    def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def _init_local_model(self):
+        """
+        Load an ONNX copy of the embedding model for local inference.
+
+        Enabled with LOCAL_EMBED=1; requires optimum[onnxruntime] and
+        transformers. Falls back to the HF Inference API when unavailable.
+        """
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            from transformers import AutoTokenizer
+
+            self._local_model = ORTModelForFeatureExtraction.from_pretrained(
+                self.embedding_model, export=True)
+            self._local_tokenizer = AutoTokenizer.from_pretrained(self.embedding_model)
+            logger.info(f"Using local ONNX embeddings for {self.embedding_model}")
+        except Exception as e:
+            logger.warning(f"Local embedding model unavailable, using HF API: {str(e)}")
+            self._local_model = None
+            self._local_tokenizer = None
+
+    def _init_st_model(self, device: str):
+        """
+        Load the embedding model on a GPU at fp16 for ingest throughput.
+
+        Enabled with EMBED_DEVICE=cuda; requires sentence-transformers and a
+        CUDA build of torch. Falls back to the HF Inference API when
+        unavailable.
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+
+            self._st_model = SentenceTransformer(self.embedding_model, device=device).half()
+            logger.info(f"Using {device} fp16 embeddings for {self.embedding_model}")
+        except Exception as e:
+            logger.warning(f"GPU embedding model unavailable, using HF API: {str(e)}")
+            self._st_model = None
+
+    def _embed_st(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with the GPU sentence-transformers model.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            Normalized float32 array of shape (len(texts), dimension)
+        """
+        return self._st_model.encode(texts, batch_size=128, convert_to_numpy=True,
+                                     normalize_embeddings=True,
+                                     show_progress_bar=False).astype(np.float32, copy=False)
+
+    def _embed_local(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts with the local ONNX model (mean pooling + L2 norm).
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            Normalized float32 array of shape (len(texts), dimension)
+        """
+        encoded = self._local_tokenizer(texts, padding=True, truncation=True,
+                                        return_tensors="np")
+        hidden = self._local_model(**encoded).last_hidden_state
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        embeddings = (hidden * mask).sum(axis=1) / mask.sum(axis=1).clip(1e-9)
+        embeddings = embeddings.astype(np.float32, copy=False)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True).clip(1e-12)
+        return embeddings
+
+    async def create_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Create embeddings for a list of texts using Hugging Face API.
-        
+
+        Batches are dispatched concurrently so total wall time is bounded by
+        the slowest in-flight request rather than the sum of all round-trips.
+
         Args:
             texts: List of text strings to embed
-            
+
         Returns:
-            List of embedding vectors
-            
+            Contiguous float32 array of shape (len(texts), dimension)
+
         Raises:
             Exception: If embedding creation fails
         """
         try:
             logger.info(f"Creating embeddings for {len(texts)} texts")
-            
-            # Process in batches to avoid rate limits
-            batch_size = 50  # Smaller batch size for HF API
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                
-                # Get embeddings from Hugging Face
-                batch_embeddings = self.client.feature_extraction(batch)
-                
-                # Convert to list of lists if needed
-                if isinstance(batch_embeddings, np.ndarray):
-                    if batch_embeddings.ndim == 2:
-                        batch_embeddings = batch_embeddings.tolist()
-                    elif batch_embeddings.ndim == 3:
-                        # Handle case where we get 3D array
-                        batch_embeddings = batch_embeddings.tolist()
-                
-                all_embeddings.extend(batch_embeddings)
-                
-                logger.info(f"Processed batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1}")
-            
+
+            if self._st_model is not None:
+                return await asyncio.to_thread(self._embed_st, texts)
+
+            if self._local_model is not None:
+                batches = [texts[i:i + 64] for i in range(0, len(texts), 64)]
+                parts = [await asyncio.to_thread(self._embed_local, batch)
+                         for batch in batches]
+                return np.concatenate(parts) if parts else np.empty(
+                    (0, self.dimension), dtype=np.float32)
+
+            batch_size = 256  # HF TEI supports large batches
+            max_in_flight = 8  # Cap concurrent requests to avoid rate limits
+            semaphore = asyncio.Semaphore(max_in_flight)
+
+            async def embed_batch(batch: List[str]) -> np.ndarray:
+                async with semaphore:
+                    result = await self.async_client.feature_extraction(batch)
+                    return np.asarray(result, dtype=np.float32)
+
+            tasks = [embed_batch(texts[i:i + batch_size])
+                     for i in range(0, len(texts), batch_size)]
+            batch_results = await asyncio.gather(*tasks)
+
+            # Stream results into a pre-allocated buffer instead of
+            # list-extend, normalizing each batch in the same pass so no
+            # separate full-matrix normalize sweep is needed later
+            dimension = batch_results[0].shape[-1] if batch_results else self.dimension
+            all_embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+            offset = 0
+            for batch_embeddings in batch_results:
+                batch_embeddings = batch_embeddings.reshape(-1, dimension)
+                batch_embeddings /= np.linalg.norm(
+                    batch_embeddings, axis=1, keepdims=True).clip(1e-12)
+                all_embeddings[offset:offset + len(batch_embeddings)] = batch_embeddings
+                offset += len(batch_embeddings)
+
             logger.info("Embeddings created successfully")
             return all_embeddings
-            
+
         except Exception as e:
             logger.error(f"Error creating embeddings: {str(e)}")
             raise Exception(f"Failed to create embeddings: {str(e)}")
@@ -109,8 +239,14 @@ class RAGSystem:
             Embedding vector
         """
         try:
+            if self._st_model is not None:
+                return self._embed_st([text])[0].tolist()
+
+            if self._local_model is not None:
+                return self._embed_local([text])[0].tolist()
+
             embedding = self.client.feature_extraction(text)
-            
+
             # Convert to list if needed
             if isinstance(embedding, np.ndarray):
                 if embedding.ndim == 2:
@@ -123,35 +259,57 @@ class RAGSystem:
             logger.error(f"Error creating embedding: {str(e)}")
             raise Exception(f"Failed to create embedding: {str(e)}")
     
-    def create_faiss_index(self, embeddings: List[List[float]]) -> faiss.Index:
+    def _embed_query_bytes(self, text: str) -> bytes:
+        """
+        Embed a single normalized query string and return raw float32 bytes.
+
+        Bytes are used so the result is hashable/immutable and safe to share
+        between cache hits. The vector is L2-normalized here, once, so the
+        hot search path does not re-normalize on every call.
+        """
+        embedding = self.create_embedding(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= max(float(np.linalg.norm(vector)), 1e-12)
+        return vector.tobytes()
+
+    def create_faiss_index(self, embeddings: np.ndarray) -> faiss.Index:
         """
         Create FAISS index from embeddings.
-        
+
         Args:
-            embeddings: List of embedding vectors
-            
+            embeddings: Float32 array of shape (n, dimension), already
+                L2-normalized by create_embeddings
+
         Returns:
             FAISS index
         """
         try:
-            # Convert to numpy array
-            embeddings_array = np.array(embeddings, dtype=np.float32)
-            
-            # Normalize embeddings for cosine similarity
-            faiss.normalize_L2(embeddings_array)
-            
-            # Create FAISS index
-            index = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
+            # Ensure contiguous float32 without copying when already correct.
+            # Embeddings arrive unit-norm from create_embeddings, so there is
+            # no extra normalize pass over the full matrix here.
+            embeddings_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+            # Create FAISS index via the factory so the topology (HNSW/IVF)
+            # is configurable instead of a brute-force flat scan
+            index = faiss.index_factory(self.dimension, self.index_factory,
+                                        faiss.METRIC_INNER_PRODUCT)
+
+            # IVF and quantized (SQ/PQ) indexes need training before vectors
+            # can be added; flat/HNSW indexes report is_trained immediately
+            if not index.is_trained:
+                logger.info(f"Training {self.index_factory} index on {len(embeddings_array)} vectors")
+                index.train(embeddings_array)
+
             index.add(embeddings_array)
-            
-            logger.info(f"Created FAISS index with {index.ntotal} vectors")
+
+            logger.info(f"Created FAISS index ({self.index_factory}) with {index.ntotal} vectors")
             return index
             
         except Exception as e:
             logger.error(f"Error creating FAISS index: {str(e)}")
             raise Exception(f"Failed to create FAISS index: {str(e)}")
     
-    def build_index(self, documents: List[str], metadata: List[Dict[str, Any]]) -> bool:
+    async def build_index(self, documents: List[str], metadata: List[Dict[str, Any]]) -> bool:
         """
         Build the complete FAISS index from documents and metadata.
         
@@ -172,7 +330,7 @@ class RAGSystem:
             logger.info(f"Building index for {len(documents)} documents")
             
             # Create embeddings
-            embeddings = self.create_embeddings(documents)
+            embeddings = await self.create_embeddings(documents)
             
             # Create FAISS index
             self.index = self.create_faiss_index(embeddings)
@@ -180,7 +338,8 @@ class RAGSystem:
             # Store documents and metadata
             self.documents = documents
             self.metadata = metadata
-            
+            self._build_meta_columns()
+
             # Save index
             self.save_index()
             
@@ -208,21 +367,26 @@ class RAGSystem:
             # Save FAISS index
             faiss.write_index(self.index, str(self.index_path / "index.faiss"))
             
-            # Save metadata
-            with open(self.index_path / "metadata.pkl", "wb") as f:
-                pickle.dump(self.metadata, f)
-            
-            # Save documents
-            with open(self.index_path / "documents.pkl", "wb") as f:
-                pickle.dump(self.documents, f)
-            
-            # Save configuration
+            # Save metadata and documents as one columnar Parquet file;
+            # Arrow string buffers load far faster than unpickling N dicts.
+            # NaN cells from pandas arrive as floats and break Arrow's
+            # string-column inference, so store them as nulls
+            sanitized = [{k: (None if isinstance(v, float) and v != v else v)
+                          for k, v in m.items()} for m in self.metadata]
+            meta_table = pa.Table.from_pylist(sanitized)
+            meta_table = meta_table.append_column(
+                "document", pa.array(self.documents, type=pa.string()))
+            pq.write_table(meta_table, self.index_path / "meta.parquet")
+
+            # Save configuration as plain JSON (human-readable, no arbitrary
+            # code execution on load like pickle)
             config = {
                 "embedding_model": self.embedding_model,
-                "dimension": self.dimension
+                "dimension": self.dimension,
+                "index_factory": self.index_factory
             }
-            with open(self.index_path / "config.pkl", "wb") as f:
-                pickle.dump(config, f)
+            with open(self.index_path / "config.json", "w") as f:
+                json.dump(config, f)
             
             logger.info(f"Index saved to {self.index_path}")
             return True
@@ -241,33 +405,57 @@ class RAGSystem:
         try:
             # Check if files exist
             index_file = self.index_path / "index.faiss"
+            meta_file = self.index_path / "meta.parquet"
             metadata_file = self.index_path / "metadata.pkl"
             documents_file = self.index_path / "documents.pkl"
-            config_file = self.index_path / "config.pkl"
-            
-            if not all([index_file.exists(), metadata_file.exists(), 
-                       documents_file.exists(), config_file.exists()]):
+            config_file = self.index_path / "config.json"
+            legacy_config_file = self.index_path / "config.pkl"
+
+            has_parquet = meta_file.exists()
+            has_legacy = metadata_file.exists() and documents_file.exists()
+            has_config = config_file.exists() or legacy_config_file.exists()
+            if not (index_file.exists() and has_config
+                    and (has_parquet or has_legacy)):
                 logger.info("Index files not found")
                 return False
-            
-            # Load configuration
-            with open(config_file, "rb") as f:
-                config = pickle.load(f)
+
+            # Load configuration (JSON preferred, pickle legacy)
+            if config_file.exists():
+                with open(config_file, "r") as f:
+                    config = json.load(f)
+            else:
+                with open(legacy_config_file, "rb") as f:
+                    config = pickle.load(f)
             
             # Update configuration
             self.embedding_model = config.get("embedding_model", self.embedding_model)
             self.dimension = config.get("dimension", self.dimension)
-            
-            # Load FAISS index
-            self.index = faiss.read_index(str(index_file))
-            
-            # Load metadata and documents
-            with open(metadata_file, "rb") as f:
-                self.metadata = pickle.load(f)
-            
-            with open(documents_file, "rb") as f:
-                self.documents = pickle.load(f)
-            
+            self.index_factory = config.get("index_factory", self.index_factory)
+            
+            # Load FAISS index; prefer memory-mapping so the OS page cache
+            # backs the vectors and multiple workers share one physical copy.
+            # Not every index type supports mmap, so fall back to a full read.
+            try:
+                self.index = faiss.read_index(
+                    str(index_file), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except Exception:
+                logger.info("mmap load not supported for this index, reading into RAM")
+                self.index = faiss.read_index(str(index_file))
+            
+            # Load metadata and documents (Parquet preferred, pickle legacy)
+            if has_parquet:
+                meta_table = pq.read_table(meta_file, memory_map=True)
+                self.documents = meta_table.column("document").to_pylist()
+                self.metadata = meta_table.drop(["document"]).to_pylist()
+            else:
+                with open(metadata_file, "rb") as f:
+                    self.metadata = pickle.load(f)
+
+                with open(documents_file, "rb") as f:
+                    self.documents = pickle.load(f)
+
+            self._build_meta_columns()
+
             logger.info(f"Loaded index with {self.index.ntotal} vectors")
             return True
             
@@ -290,33 +478,29 @@ class RAGSystem:
             if self.index is None:
                 raise ValueError("Index not loaded. Please load or build an index first.")
             
-            # Create query embedding
-            query_embedding = self.create_embedding(query)
-            
-            # Convert to numpy array and normalize
-            query_array = np.array([query_embedding], dtype=np.float32)
-            faiss.normalize_L2(query_array)
-            
+            # Create query embedding (cached on the normalized query text so
+            # repeated questions cost a hash lookup instead of an HF call)
+            query_bytes = self._embed_query_cached(query.strip().lower())
+            query_vec = np.frombuffer(query_bytes, dtype=np.float32)
+
+            # Fresh (1, d) array per call: searches run concurrently on the
+            # threadpool, so the query vector must not be shared state. The
+            # cached embedding is already unit-norm, so no normalize pass is
+            # needed here.
+            query_array = np.array(query_vec, dtype=np.float32, ndmin=2)
+
+            # For IVF indexes, allow tuning how many cells are probed per query
+            if hasattr(self.index, "nprobe"):
+                self.index.nprobe = int(os.getenv("FAISS_NPROBE", "16"))
+
             # Search
             scores, indices = self.index.search(query_array, min(k, self.index.ntotal))
             
             # Format results
             results = []
             for score, idx in zip(scores[0], indices[0]):
-                if idx < len(self.metadata) and idx < len(self.documents):
-                    result = {
-                        "scheme": self.metadata[idx].get("scheme_name", "Unknown"),
-                        "sector": self.metadata[idx].get("sector", "Unknown"),
-                        "state": self.metadata[idx].get("state", "Unknown"),
-                        "eligibility": self.metadata[idx].get("eligibility", "Not specified"),
-                        "benefits": self.metadata[idx].get("benefits", "Not specified"),
-                        "official_url": self.metadata[idx].get("official_url", "Not available"),
-                        "level": self.metadata[idx].get("level", "Unknown"),
-                        "tags": self.metadata[idx].get("tags", ""),
-                        "score": float(score),
-                        "document": self.documents[idx]
-                    }
-                    results.append(result)
+                if 0 <= idx < len(self.metadata) and idx < len(self.documents):
+                    results.append(self._format_result(int(idx), float(score)))
             
             logger.info(f"Found {len(results)} results for query: {query[:50]}...")
             return results
@@ -325,6 +509,78 @@ class RAGSystem:
             logger.error(f"Error searching: {str(e)}")
             raise Exception(f"Search failed: {str(e)}")
     
+    def search_batch(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar documents for several queries at once.
+
+        All queries are embedded in a single Hugging Face call and searched
+        with one FAISS call, which FAISS parallelizes internally across its
+        OpenMP threads.
+
+        Args:
+            queries: List of search query strings
+            k: Number of results to return per query
+
+        Returns:
+            One list of search results per query, in input order
+        """
+        try:
+            if self.index is None:
+                raise ValueError("Index not loaded. Please load or build an index first.")
+
+            if not queries:
+                return []
+
+            # Embed all queries in one round-trip
+            embeddings = self.client.feature_extraction(queries)
+            query_matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(queries), -1)
+            faiss.normalize_L2(query_matrix)
+
+            if hasattr(self.index, "nprobe"):
+                self.index.nprobe = int(os.getenv("FAISS_NPROBE", "16"))
+
+            # Single batched FAISS search over the 2-D query matrix
+            scores, indices = self.index.search(query_matrix, min(k, self.index.ntotal))
+
+            all_results = []
+            for row_scores, row_indices in zip(scores, indices):
+                results = []
+                for score, idx in zip(row_scores, row_indices):
+                    if 0 <= idx < len(self.metadata) and idx < len(self.documents):
+                        results.append(self._format_result(int(idx), float(score)))
+                all_results.append(results)
+
+            logger.info(f"Batch search completed for {len(queries)} queries")
+            return all_results
+
+        except Exception as e:
+            logger.error(f"Error in batch search: {str(e)}")
+            raise Exception(f"Batch search failed: {str(e)}")
+
+    def _build_meta_columns(self):
+        """
+        Precompute one array per result field (structure-of-arrays view).
+
+        Result formatting then becomes a plain array gather per hit instead
+        of per-field dict lookups with defaults on every query.
+        """
+        self._meta_cols = {
+            result_key: np.asarray(
+                [m.get(meta_key, default) for m in self.metadata], dtype=object)
+            for result_key, meta_key, default in RESULT_FIELDS
+        }
+
+    def _format_result(self, idx: int, score: float) -> Dict[str, Any]:
+        """Build the result payload for a single hit."""
+        if self._meta_cols is not None:
+            result = {key: self._meta_cols[key][idx] for key, _, _ in RESULT_FIELDS}
+        else:
+            result = {key: self.metadata[idx].get(meta_key, default)
+                      for key, meta_key, default in RESULT_FIELDS}
+        result["score"] = score
+        result["document"] = self.documents[idx]
+        return result
+
     def get_index_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the current index.
@@ -339,7 +595,8 @@ class RAGSystem:
             "total_documents": self.index.ntotal,
             "embedding_model": self.embedding_model,
             "dimension": self.dimension,
-            "index_type": "FAISS IndexFlatIP",
+            "index_type": f"FAISS {self.index_factory}",
+            "quantized": any(q in self.index_factory for q in ("SQ", "PQ")),
             "metadata_count": len(self.metadata),
             "documents_count": len(self.documents)
         }
@@ -364,19 +621,68 @@ class RAGSystem:
             logger.error(f"Error loading CSV data: {str(e)}")
             raise Exception(f"Failed to load CSV data: {str(e)}")
 
-    def build_index_from_csv(self, csv_path: str) -> bool:
+    def iter_csv_chunks(self, csv_path: str, chunk_size: int = 4096):
+        """
+        Stream scheme data from a CSV file in bounded chunks.
+
+        Args:
+            csv_path: Path to the CSV file containing scheme data.
+            chunk_size: Number of rows per chunk.
+
+        Yields:
+            Tuples of (documents, metadata) for each chunk.
+        """
+        for df in pd.read_csv(csv_path, chunksize=chunk_size):
+            yield df['details'].tolist(), df.to_dict('records')
+
+    async def build_index_from_csv(self, csv_path: str, chunk_size: int = 4096) -> bool:
         """
         Build the FAISS index using data from a CSV file.
-        
+
+        The CSV is streamed in chunks so peak memory stays bounded: each
+        chunk is embedded and added to the index before the next one is
+        read, instead of materializing all rows and embeddings up front.
+
         Args:
             csv_path: Path to the CSV file containing scheme data.
-            
+            chunk_size: Number of rows read and embedded per chunk.
+
         Returns:
             True if successful, False otherwise.
         """
         try:
-            documents, metadata = self.load_csv_data(csv_path)
-            return self.build_index(documents, metadata)
+            index = None
+            documents: List[str] = []
+            metadata: List[Dict[str, Any]] = []
+
+            for chunk_docs, chunk_meta in self.iter_csv_chunks(csv_path, chunk_size):
+                # create_embeddings returns unit-norm vectors already
+                embeddings = await self.create_embeddings(chunk_docs)
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+                if index is None:
+                    index = faiss.index_factory(self.dimension, self.index_factory,
+                                                faiss.METRIC_INNER_PRODUCT)
+                    if not index.is_trained:
+                        index.train(embeddings)
+
+                index.add(embeddings)
+                documents.extend(chunk_docs)
+                metadata.extend(chunk_meta)
+                logger.info(f"Indexed {index.ntotal} vectors so far")
+
+            if index is None:
+                raise ValueError("CSV contained no rows")
+
+            self.index = index
+            self.documents = documents
+            self.metadata = metadata
+            self._build_meta_columns()
+            if not self.save_index():
+                raise ValueError("Failed to persist index to disk")
+
+            logger.info(f"Built index from CSV with {index.ntotal} documents")
+            return True
         except Exception as e:
             logger.error(f"Error building index from CSV: {str(e)}")
             return False
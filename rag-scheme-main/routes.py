@@ -1,12 +1,29 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import os
+import pickle
+import re
+import threading
 from pathlib import Path
-import csv
+import numpy as np
 import pandas as pd
 import difflib
 
+try:
+    from rapidfuzz import fuzz as _rf_fuzz, process as _rf_process
+except ImportError:  # rapidfuzz is a fast optional accelerator; difflib still works
+    _rf_fuzz = None
+    _rf_process = None
+
+def _fuzzy_ratio(a: str, b: str) -> float:
+    """Similarity in [0, 1] using rapidfuzz when available, difflib otherwise."""
+    if _rf_fuzz is not None:
+        return _rf_fuzz.ratio(a, b) / 100.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
 from utils.embeddings import EmbeddingService
 from utils.faiss_handler import FAISSHandler
 from utils.csv_processor import CSVProcessor
@@ -18,8 +35,130 @@ embedding_service = EmbeddingService()
 faiss_handler = FAISSHandler()
 csv_processor = CSVProcessor()
 
+def _fast_match(q_l: str, names_l: List[str]) -> Optional[int]:
+    """Row index of the shortest scheme name containing the query, if any.
+
+    Exact and substring hits are unambiguous (the shortest containing name
+    is the most specific), so callers only pay for fuzzy scoring when this
+    returns None.
+    """
+    if not q_l:
+        return None
+    best_idx = None
+    best_len = None
+    for i, name_l in enumerate(names_l):
+        if q_l == name_l:
+            return i
+        if q_l in name_l and (best_len is None or len(name_l) < best_len):
+            best_idx = i
+            best_len = len(name_l)
+    return best_idx
+
+def _best_fuzzy_idx(q_l: str, names_l: List[str]) -> Optional[int]:
+    """Index of the fuzzy-closest scheme name.
+
+    rapidfuzz scans the whole name list in one C call when available;
+    otherwise fall back to the difflib loop.
+    """
+    if not names_l:
+        return None
+    if _rf_process is not None:
+        hit = _rf_process.extractOne(q_l, names_l,
+                                     scorer=_rf_fuzz.WRatio, score_cutoff=30)
+        return hit[2] if hit else None
+    best_idx = None
+    best_score = -1.0
+    for i, n in enumerate(names_l):
+        s = difflib.SequenceMatcher(None, q_l, n).ratio()
+        if s > best_score:
+            best_score = s
+            best_idx = i
+    return best_idx
+
+# Compiled once; matches the first URL-ish token in Gemini replies
+_URL_RE = re.compile(r"(https?://[^\s\)]+)")
+
+# Candidate columns that may hold an application/landing URL, most
+# trustworthy first (covers the naming variants seen across CSV exports)
+_URL_KEYS = (
+    'application', 'official_url', 'application_link', 'apply', 'url', 'link',
+    'Application', 'Official_URL', 'Application Link', 'Apply', 'URL', 'Link')
+
+# Shared Gemini model, built lazily on first use; GenerativeModel is
+# thread-safe for generate_content, so one instance serves all endpoints
+_GEMINI_MODEL = None
+_GEMINI_LOCK = threading.Lock()
+
+def _get_gemini_model():
+    """Return the shared Gemini model, or None when no API key is configured."""
+    global _GEMINI_MODEL
+    if _GEMINI_MODEL is not None:
+        return _GEMINI_MODEL
+    api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        return None
+    with _GEMINI_LOCK:
+        if _GEMINI_MODEL is None:
+            try:
+                import google.generativeai as genai
+                genai.configure(api_key=api_key)
+                _GEMINI_MODEL = genai.GenerativeModel("gemini-1.5-flash")
+            except Exception:
+                return None
+    return _GEMINI_MODEL
+
+@lru_cache(maxsize=2048)
+def _gemini(prompt: str) -> str:
+    """Memoized Gemini completion; identical prompts reuse the first reply.
+
+    Errors are raised (and therefore not cached), so transient failures do
+    not poison the cache.
+    """
+    model = _get_gemini_model()
+    if model is None:
+        raise RuntimeError("Gemini is not configured")
+    resp = model.generate_content(prompt)
+    return resp.text if hasattr(resp, 'text') else str(resp)
+
+@lru_cache(maxsize=4096)
+def _embed_query_cached(normalized_query: str) -> tuple:
+    """Embed a query once per normalized text; repeats skip the embedding API."""
+    return tuple(embedding_service.embed_query(normalized_query))
+
 # --- Gemini + CSV Chatbot Utilities ---
+# Endpoints run on the threadpool, so the cache is guarded by a lock on the
+# miss path and bounded so switching CSVs cannot grow it without limit
 _CSV_CACHE: Dict[str, pd.DataFrame] = {}
+_CSV_CACHE_LOCK = threading.Lock()
+_CSV_CACHE_MAX = 4
+
+# Text columns that get a precomputed lowercase twin ('<col>_l') for filtering
+_NORM_COLS = ("state", "schemeCategory", "eligibility", "tags",
+              "scheme_name", "slug", "details")
+
+def _attach_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Precompute lowercase copies of the filterable text columns once per load."""
+    for col in _NORM_COLS:
+        if col in df.columns:
+            df[col + "_l"] = df[col].astype(str).str.lower()
+
+    # Row-position lists and token sets for the matching endpoints, derived
+    # once here instead of per request per row
+    def col_list(name: str) -> List[str]:
+        return df[name].tolist() if name in df.columns else [""] * len(df)
+
+    df.attrs["name_lower"] = col_list("scheme_name_l")
+    df.attrs["slug_lower"] = col_list("slug_l")
+    df.attrs["details_lower"] = col_list("details_l")
+    df.attrs["name_tokens"] = [frozenset(n.split()) for n in df.attrs["name_lower"]]
+    df.attrs["details_tokens"] = [frozenset(d.split()) for d in df.attrs["details_lower"]]
+
+    # O(1) exact-name lookup; on duplicate names the first row wins
+    name_to_idx: Dict[str, int] = {}
+    for i, n in enumerate(df.attrs["name_lower"]):
+        name_to_idx.setdefault(n, i)
+    df.attrs["name_to_idx"] = name_to_idx
+    return df
 
 def _load_schemes_csv(csv_path: Optional[str] = None) -> pd.DataFrame:
     """Load schemes CSV into a cached pandas DataFrame."""
@@ -28,13 +167,54 @@ def _load_schemes_csv(csv_path: Optional[str] = None) -> pd.DataFrame:
         raise HTTPException(status_code=404, detail=f"schemes.csv not found at {resolved}")
     if resolved in _CSV_CACHE:
         return _CSV_CACHE[resolved]
+    with _CSV_CACHE_LOCK:
+        # Re-check under the lock so concurrent first requests parse once
+        if resolved in _CSV_CACHE:
+            return _CSV_CACHE[resolved]
+        return _load_schemes_csv_locked(resolved)
+
+def _load_schemes_csv_locked(resolved: str) -> pd.DataFrame:
+    """Parse and cache a CSV; caller holds _CSV_CACHE_LOCK."""
     try:
-        df = pd.read_csv(resolved)
+        # A pickled sidecar (DataFrame + derived columns/attrs) skips the
+        # pandas parse and re-derivation on cold start; it is only trusted
+        # while it is newer than the CSV itself
+        cache_path = resolved + ".cache.pkl"
+        df = None
+        if (os.path.exists(cache_path)
+                and os.path.getmtime(cache_path) >= os.path.getmtime(resolved)):
+            try:
+                with open(cache_path, "rb") as f:
+                    df = pickle.load(f)
+                if "name_to_idx" not in df.attrs:
+                    df = None  # sidecar predates newer derived attrs
+            except Exception:
+                df = None  # stale/corrupt sidecar, fall through to a fresh parse
+
+        if df is None:
+            df = _attach_derived_columns(pd.read_csv(resolved))
+            try:
+                tmp_path = cache_path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    pickle.dump(df, f, protocol=5)
+                os.replace(tmp_path, cache_path)  # atomic publish
+            except Exception:
+                pass  # read-only filesystems just re-parse next cold start
+
+        while len(_CSV_CACHE) >= _CSV_CACHE_MAX:
+            _CSV_CACHE.pop(next(iter(_CSV_CACHE)))  # evict oldest entry
         _CSV_CACHE[resolved] = df
         return df
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read CSV: {e}")
 
+# Pre-warm the default CSV at import so the first request skips the parse;
+# a missing file here is fine, endpoints will report it per request
+try:
+    _load_schemes_csv()
+except Exception:
+    pass
+
 def _filter_schemes(
     df: pd.DataFrame,
     name_query: Optional[str] = None,
@@ -45,52 +225,81 @@ def _filter_schemes(
     limit: int = 10,
 ) -> pd.DataFrame:
     """Heuristic filtering of schemes based on user attributes and optional name text query."""
-    filtered = df.copy()
-    def norm(s):
-        return str(s).strip().lower() if pd.notna(s) else ""
-
-    if state:
-        s = norm(state)
-        filtered = filtered[filtered.get("state").apply(lambda x: s in norm(x) if "state" in filtered.columns else True)]
-    if sector and "schemeCategory" in filtered.columns:
-        sec = norm(sector)
-        filtered = filtered[filtered["schemeCategory"].apply(lambda x: sec in norm(x))]
-    if income_level and "eligibility" in filtered.columns:
-        inc = norm(income_level)
-        filtered = filtered[filtered["eligibility"].apply(lambda x: inc in norm(x))]
-    if tags and "tags" in filtered.columns:
-        tagset = {norm(t) for t in tags}
-        filtered = filtered[filtered["tags"].apply(lambda x: any(t in norm(x) for t in tagset))]
+    # Combine vectorized substring masks on the precomputed lowercase columns
+    # instead of per-row Python lambdas
+    mask = np.ones(len(df), dtype=bool)
+
+    def contains(col: str, needle: str) -> np.ndarray:
+        return df[col].str.contains(needle, regex=False, na=False).to_numpy()
+
+    if state and "state_l" in df.columns:
+        mask &= contains("state_l", state.strip().lower())
+    if sector and "schemeCategory_l" in df.columns:
+        mask &= contains("schemeCategory_l", sector.strip().lower())
+    if income_level and "eligibility_l" in df.columns:
+        mask &= contains("eligibility_l", income_level.strip().lower())
+    if tags and "tags_l" in df.columns:
+        tagset = {str(t).strip().lower() for t in tags if str(t).strip()}
+        if tagset:
+            pattern = "|".join(map(re.escape, sorted(tagset)))
+            mask &= df["tags_l"].str.contains(pattern, regex=True, na=False).to_numpy()
     if name_query:
-        q = norm(name_query)
-        mask = (
-            filtered.get("scheme_name", pd.Series([], dtype=str)).apply(lambda x: q in norm(x)) |
-            filtered.get("slug", pd.Series([], dtype=str)).apply(lambda x: q in norm(x)) |
-            filtered.get("details", pd.Series([], dtype=str)).apply(lambda x: q in norm(x))
-        )
-        filtered = filtered[mask]
-
-    # If nothing left, fall back to original df to allow Gemini to ask clarifying questions
-    if filtered.empty:
-        filtered = df.head(limit)
-    else:
-        filtered = filtered.head(limit)
-    return filtered
+        q = name_query.strip().lower()
+        name_mask = np.zeros(len(df), dtype=bool)
+        for col in ("scheme_name_l", "slug_l", "details_l"):
+            if col in df.columns:
+                name_mask |= contains(col, q)
+        mask &= name_mask
+
+    # Slice only the rows we will actually return: materializing df.loc[mask]
+    # copies every matching row even though callers keep at most `limit`
+    if mask.all():
+        return df.head(limit)
+
+    idx = np.flatnonzero(mask)[:limit]
+    if idx.size == 0:
+        # If nothing left, fall back to original df to allow Gemini to ask clarifying questions
+        return df.head(limit)
+    return df.iloc[idx]
+
+# Columns the chat context block is assembled from, in render order
+_CONTEXT_COLS = ['scheme_name', 'details', 'benefits', 'eligibility', 'state',
+                 'schemeCategory', 'level', 'tags', 'application', 'official_url']
+
+# Chat message roles -> prompt speaker labels; anything else reads as System
+_ROLE_MAP = {"user": "User", "assistant": "Assistant"}
+
+# Columns backing the UI's recommended-schemes panel
+_REC_COLS = ['scheme_name', 'state', 'schemeCategory', 'eligibility',
+             'benefits', 'application', 'official_url']
+
+def _recommended_list(candidates: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Shape filtered candidate rows into the recommended-schemes payload."""
+    block = candidates.reindex(columns=_REC_COLS).fillna('')
+    recs = block.rename(columns={'schemeCategory': 'category'}).to_dict('records')
+    for r in recs:
+        official = r.pop('official_url')
+        r['application'] = r['application'] or official
+    return recs
 
 def _format_schemes_for_context(rows: pd.DataFrame) -> str:
+    # reindex + itertuples hands out plain tuples instead of a Series per
+    # row, which is an order of magnitude cheaper than iterrows
+    block = rows.reindex(columns=_CONTEXT_COLS).fillna('')
     parts: List[str] = []
-    for _, r in rows.iterrows():
-        parts.append("\n".join([
-            f"Scheme Name: {r.get('scheme_name', '')}",
-            f"Details: {r.get('details', '')}",
-            f"Benefits: {r.get('benefits', '')}",
-            f"Eligibility: {r.get('eligibility', '')}",
-            f"State: {r.get('state', '')}",
-            f"Category: {r.get('schemeCategory', '')}",
-            f"Level: {r.get('level', '')}",
-            f"Tags: {r.get('tags', '')}",
-            f"Application: {r.get('application', '') or r.get('official_url', '')}",
-        ]))
+    for (name, details, benefits, eligibility, state, category, level, tags,
+         application, official_url) in block.itertuples(index=False, name=None):
+        parts.append(
+            f"Scheme Name: {name}\n"
+            f"Details: {details}\n"
+            f"Benefits: {benefits}\n"
+            f"Eligibility: {eligibility}\n"
+            f"State: {state}\n"
+            f"Category: {category}\n"
+            f"Level: {level}\n"
+            f"Tags: {tags}\n"
+            f"Application: {application or official_url}"
+        )
     return "\n\n---\n\n".join(parts)
 
 class IngestRequest(BaseModel):
@@ -103,7 +312,8 @@ class IngestResponse(BaseModel):
     index_size: int
 
 class QueryRequest(BaseModel):
-    query: str
+    query: Optional[str] = None
+    queries: Optional[List[str]] = None  # batch mode: searched in one FAISS call
     k: int = 5
 
 class QueryResponse(BaseModel):
@@ -111,6 +321,9 @@ class QueryResponse(BaseModel):
     query: str
     k: int
 
+class BatchQueryResponse(BaseModel):
+    responses: List[QueryResponse]
+
 class ExplainRequest(BaseModel):
     scheme_query: str
     question: Optional[str] = None
@@ -166,7 +379,7 @@ class EnrichResponse(BaseModel):
     enriched: List[EnrichedScheme]
 
 @router.post("/ingest", response_model=IngestResponse)
-async def ingest_csv(request: IngestRequest):
+def ingest_csv(request: IngestRequest):
     """Ingest CSV file and create/update FAISS index."""
     try:
         # Validate CSV file
@@ -183,7 +396,7 @@ async def ingest_csv(request: IngestRequest):
             )
         
         # Process CSV
-        chunks, sources = csv_processor.process_csv(request.csv_path, request.text_column)
+        chunks, metadatas = csv_processor.process_csv(request.csv_path, request.text_column)
         
         if not chunks:
             raise HTTPException(
@@ -191,17 +404,43 @@ async def ingest_csv(request: IngestRequest):
                 detail="No valid text data found in CSV"
             )
         
-        # Generate embeddings
-        embeddings = embedding_service.embed_texts(chunks)
+        # Rebuilds from an unchanged CSV reuse the persisted vectors
+        # instead of re-paying the embedding API for every chunk
+        csv_hash = FAISSHandler.file_sha256(request.csv_path)
+        cached = faiss_handler.load_cached_embeddings(csv_hash)
+
+        if cached is not None and len(cached) == len(chunks):
+            embeddings = np.ascontiguousarray(cached, dtype=np.float32)
+        else:
+            # Generate embeddings in length-sorted mini-batches: sorting keeps
+            # tokenizer padding waste low and fixed-size batches bound peak memory
+            batch_size = 64
+            order = sorted(range(len(chunks)), key=lambda i: len(chunks[i].split()))
+            sorted_chunks = [chunks[i] for i in order]
+            parts = [
+                embedding_service.embed_texts(sorted_chunks[i:i + batch_size])
+                for i in range(0, len(sorted_chunks), batch_size)
+            ]
+            sorted_embeddings = np.vstack(parts)
+
+            # Invert the sort so embeddings[i] lines up with chunks[i] again;
+            # keep the matrix contiguous float32 so FAISS ingests it zero-copy
+            embeddings = np.empty_like(sorted_embeddings)
+            embeddings[order] = sorted_embeddings
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        faiss_handler.source_hash = csv_hash
         
         # Create or update FAISS index
         if faiss_handler.index is None:
             faiss_handler.create_index(len(embeddings[0]))
         
-        # Add embeddings to index
-        faiss_handler.add_embeddings(embeddings, chunks)
-        
-        # Save index
+        # Add embeddings to index (already L2-normalized upstream)
+        faiss_handler.add_embeddings(embeddings, chunks, metadatas, normalized=True)
+
+        # Tune nprobe/efSearch against the fresh corpus, then persist both
+        # the index and the chosen knobs
+        faiss_handler.autotune()
         faiss_handler.save_index()
         
         return IngestResponse(
@@ -219,53 +458,61 @@ async def ingest_csv(request: IngestRequest):
         )
 
 @router.post("/explain", response_model=ExplainResponse)
-async def explain_scheme(request: ExplainRequest):
+def explain_scheme(request: ExplainRequest):
     """Explain a specific scheme using Gemini if available, grounded by CSV context."""
     try:
-        # Locate CSV
-        csv_path = request.csv_path or os.getenv("SCHEMES_CSV") or str(Path(__file__).resolve().parents[1] / "schemes.csv")
-        if not os.path.exists(csv_path):
-            raise HTTPException(status_code=404, detail=f"schemes.csv not found at {csv_path}")
+        # Use the shared cached DataFrame instead of re-parsing the CSV
+        df = _load_schemes_csv(request.csv_path)
 
-        # Load CSV and find best matching row (robust to typos and partial names)
-        target_row = None
+        # Find best matching row (robust to typos and partial names)
         best_score = -1.0
         # Normalize query: drop the word 'scheme' and extra spaces
         raw_q = (request.scheme_query or "").strip()
         q = raw_q.lower().replace(' scheme', '').strip()
         q_tokens = set([t for t in q.split() if t])
-        with open(csv_path, newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                name = (row.get('scheme_name') or '').strip()
-                slug = (row.get('slug') or '').strip()
-                details = (row.get('details') or '').strip()
-
-                name_l = name.lower()
-                slug_l = slug.lower()
-                details_l = details.lower()
-
-                # Base signals
-                substr = 1.0 if q and (q in name_l or q in slug_l) else 0.0
-                # Fuzzy similarity on title
-                fuzzy = difflib.SequenceMatcher(None, q, name_l).ratio()
-                # Token overlap with title and details
-                title_tokens = set(name_l.split())
-                details_tokens = set(details_l.split())
-                overlap = 0.0
-                if q_tokens:
-                    overlap = (len(q_tokens & title_tokens) * 1.0) + (len(q_tokens & details_tokens) * 0.2)
-
-                # Compose score: prioritize title matches
-                score = substr * 1.2 + fuzzy * 1.0 + overlap * 0.5
-
-                if score > best_score:
-                    best_score = score
-                    target_row = row
-
-        if not target_row:
+
+        names_l = df.attrs["name_lower"]
+        slugs_l = df.attrs["slug_lower"]
+        name_tokens = df.attrs["name_tokens"]
+        details_tokens_list = df.attrs["details_tokens"]
+
+        # Exact/substring hits are unambiguous and skip fuzzy scoring entirely
+        target_idx = _fast_match(q, names_l)
+
+        # With rapidfuzz, narrow to the top fuzzy candidates in one C call and
+        # only run the substring/token-overlap re-ranker on those rows
+        if target_idx is not None:
+            candidate_rows = []
+        elif _rf_process is not None and q:
+            candidate_rows = [idx for _, _, idx in _rf_process.extract(
+                q, names_l, scorer=_rf_fuzz.WRatio, limit=5, score_cutoff=30)]
+        else:
+            candidate_rows = range(len(names_l))
+
+        for i in candidate_rows:
+            name_l, slug_l = names_l[i], slugs_l[i]
+            # Base signals
+            substr = 1.0 if q and (q in name_l or q in slug_l) else 0.0
+            # Fuzzy similarity on title
+            fuzzy = _fuzzy_ratio(q, name_l)
+            # Token overlap with title and details (precomputed frozensets)
+            overlap = 0.0
+            if q_tokens:
+                overlap = (len(q_tokens & name_tokens[i]) * 1.0) + (len(q_tokens & details_tokens_list[i]) * 0.2)
+
+            # Compose score: prioritize title matches
+            score = substr * 1.2 + fuzzy * 1.0 + overlap * 0.5
+
+            if score > best_score:
+                best_score = score
+                target_idx = i
+
+        if target_idx is None:
             raise HTTPException(status_code=404, detail="No matching scheme found in CSV")
 
+        # Materialize only the winning row as a dict for the context builder
+        target_row = {k: ('' if pd.isna(v) else v) for k, v in df.iloc[target_idx].items()}
+
         # Build context
         context_parts = []
         def add(label, key):
@@ -288,12 +535,9 @@ async def explain_scheme(request: ExplainRequest):
         scheme_name = target_row.get('scheme_name') or 'Unknown Scheme'
 
         # Try Gemini
-        api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
-        if api_key:
+        model = _get_gemini_model()
+        if model:
             try:
-                import google.generativeai as genai
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel("gemini-1.5-flash")
                 prompt = (
                     "You are Yojana Mitra, an assistant for Indian government schemes.\n"
                     "Answer the user's question ONLY using the provided scheme context.\n"
@@ -302,8 +546,7 @@ async def explain_scheme(request: ExplainRequest):
                     f"Question: {request.question or 'Explain this scheme'}\n\n"
                     f"Context:\n{context}"
                 )
-                resp = model.generate_content(prompt)
-                text = resp.text if hasattr(resp, 'text') else str(resp)
+                text = _gemini(prompt)
                 return ExplainResponse(scheme_name=scheme_name, answer=text, application_link=app_link)
             except Exception as e:
                 # Fallback below
@@ -324,35 +567,27 @@ async def explain_scheme(request: ExplainRequest):
         raise HTTPException(status_code=500, detail=f"Explain failed: {str(e)}")
 
 @router.post("/resolve_url", response_model=ResolveUrlResponse)
-async def resolve_url(request: ResolveUrlRequest):
+def resolve_url(request: ResolveUrlRequest):
     """Return the best official/application URL for a scheme using CSV and Gemini as fallback."""
-    # Locate CSV
-    csv_path = request.csv_path or os.getenv("SCHEMES_CSV") or str(Path(__file__).resolve().parents[1] / "schemes.csv")
-    if not os.path.exists(csv_path):
-        raise HTTPException(status_code=404, detail=f"schemes.csv not found at {csv_path}")
+    # Use the shared cached DataFrame instead of re-parsing the CSV
+    df = _load_schemes_csv(request.csv_path)
 
     q = (request.scheme_query or "").strip()
     if not q:
         raise HTTPException(status_code=400, detail="scheme_query required")
 
-    # Try exact/heuristic match in CSV
+    # Try exact/heuristic match in CSV; substring hits skip the fuzzy pass
     best = None
-    best_score = -1
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            name = (row.get('scheme_name') or '').strip()
-            score = difflib.SequenceMatcher(None, q.lower(), name.lower()).ratio()
-            if q.lower() in name.lower():
-                score += 0.5
-            if score > best_score:
-                best_score = score
-                best = row
+    names_l = df.attrs["name_lower"]
+    q_l = q.lower()
+    best_idx = _fast_match(q_l, names_l)
+    if best_idx is None:
+        best_idx = _best_fuzzy_idx(q_l, names_l)
+    if best_idx is not None:
+        best = {k: ('' if pd.isna(v) else v) for k, v in df.iloc[best_idx].items()}
 
     def pick_url(r: Dict[str, Any]) -> Optional[str]:
-        for k in [
-            'application', 'official_url', 'application_link', 'apply', 'url', 'link',
-            'Application', 'Official_URL', 'Application Link', 'Apply', 'URL', 'Link']:
+        for k in _URL_KEYS:
             v = r.get(k)
             if v and str(v).strip():
                 return str(v).strip()
@@ -384,51 +619,35 @@ async def resolve_url(request: ResolveUrlRequest):
         return ResolveUrlResponse(scheme_name=q, url=None)
 
 @router.post("/enrich", response_model=EnrichResponse)
-async def enrich_schemes(request: EnrichRequest):
+def enrich_schemes(request: EnrichRequest):
     """Given scheme names, return short description + a single apply URL for each using Gemini (fallback to CSV fields)."""
-    csv_path = request.csv_path or os.getenv("SCHEMES_CSV") or str(Path(__file__).resolve().parents[1] / "schemes.csv")
-    if not os.path.exists(csv_path):
-        raise HTTPException(status_code=404, detail=f"schemes.csv not found at {csv_path}")
-
-    # Load CSV into memory for matching
-    rows: List[Dict[str, Any]] = []
-    with open(csv_path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
+    # Use the shared cached DataFrame instead of re-parsing the CSV
+    df = _load_schemes_csv(request.csv_path)
+    names_l = df.attrs["name_lower"]
+    name_to_idx = df.attrs["name_to_idx"]
 
     def best_row(name: str) -> Optional[Dict[str, Any]]:
-        best = None; best_score = -1
-        for r in rows:
-            n = (r.get('scheme_name') or '').strip()
-            s = difflib.SequenceMatcher(None, name.lower(), n.lower()).ratio()
-            if name.lower() in n.lower():
-                s += 0.5
-            if s > best_score:
-                best_score = s; best = r
-        return best
+        name_l = name.lower()
+        # Exact names resolve in one dict lookup; substring hits pick the
+        # most specific name without fuzzy scoring
+        best_idx = name_to_idx.get(name_l)
+        if best_idx is None:
+            best_idx = _fast_match(name_l, names_l)
+        if best_idx is None:
+            best_idx = _best_fuzzy_idx(name_l, names_l)
+        if best_idx is None:
+            return None
+        return {k: ('' if pd.isna(v) else v) for k, v in df.iloc[best_idx].items()}
 
-    api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
-    gen_model = None
-    if api_key:
-        try:
-            import google.generativeai as genai
-            genai.configure(api_key=api_key)
-            gen_model = genai.GenerativeModel("gemini-1.5-flash")
-        except Exception:
-            gen_model = None
-
-    enriched: List[EnrichedScheme] = []
-    import re
-    url_re = re.compile(r"(https?://[^\s\)]+)")
-
-    for it in request.items:
+    gen_model = _get_gemini_model()
+
+    def enrich_one(it) -> EnrichedScheme:
         row = best_row(it.scheme_name) if request.items else None
         # Defaults from CSV
         csv_desc = (row.get('details') or row.get('description') or '') if row else ''
         csv_url = None
         if row:
-            for k in ['application','official_url','application_link','url','link','Apply','Application','URL','Link','Official_URL']:
+            for k in _URL_KEYS:
                 v = row.get(k)
                 if v and str(v).strip():
                     csv_url = str(v).strip(); break
@@ -449,8 +668,7 @@ async def enrich_schemes(request: EnrichRequest):
                     f"Context (may be partial):\n{context}\n"
                     "Format:\nDescription: <text>\nURL: <url or none>\n"
                 )
-                resp = gen_model.generate_content(prompt)
-                text = (resp.text or '').strip()
+                text = _gemini(prompt).strip()
                 # Parse desc and URL lines
                 desc = None; url = None
                 for line in text.splitlines():
@@ -458,7 +676,7 @@ async def enrich_schemes(request: EnrichRequest):
                         desc = line.split(':',1)[1].strip()
                     if line.lower().startswith('url:'):
                         maybe = line.split(':',1)[1].strip()
-                        m = url_re.search(maybe)
+                        m = _URL_RE.search(maybe)
                         if m:
                             url = m.group(1)
                         elif maybe.lower() != 'none' and maybe:
@@ -478,26 +696,30 @@ async def enrich_schemes(request: EnrichRequest):
                 u = 'https://' + u if not u.startswith('www.') else 'https://' + u
             answer_url = u
 
-        enriched.append(EnrichedScheme(scheme_name=row.get('scheme_name') if row else it.scheme_name,
-                                       description=answer_desc,
-                                       apply_url=answer_url))
+        return EnrichedScheme(scheme_name=row.get('scheme_name') if row else it.scheme_name,
+                              description=answer_desc,
+                              apply_url=answer_url)
+
+    # Each item is an independent Gemini round-trip, so fan them out over a
+    # small thread pool; executor.map keeps the input order and each worker
+    # already falls back to CSV fields on its own errors
+    if len(request.items) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(request.items))) as pool:
+            enriched = list(pool.map(enrich_one, request.items))
+    else:
+        enriched = [enrich_one(it) for it in request.items]
 
     return EnrichResponse(enriched=enriched)
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
         prompt = (
             "Return ONLY the single most likely OFFICIAL application or scheme landing URL for the scheme name below.\n"
             "STRICT PREFERENCE ORDER: (1) .gov.in or .nic.in domains, (2) https://www.india.gov.in/my-government/schemes-0 entries, (3) state govt portals (.gov.in).\n"
             "If unsure, return just 'none'. Do not include any explanation, markdown or extra text.\n\n"
             f"Scheme Name: {q}\n"
         )
-        resp = model.generate_content(prompt)
-        text = (resp.text or '').strip()
+        text = _gemini(prompt).strip()
         # Extract first URL-like token
-        import re
-        m = re.search(r"(https?://[^\s\)]+)", text)
+        m = _URL_RE.search(text)
         if m:
             return ResolveUrlResponse(scheme_name=q, url=m.group(1))
     except Exception:
@@ -505,7 +727,7 @@ async def enrich_schemes(request: EnrichRequest):
     return ResolveUrlResponse(scheme_name=q, url=None)
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_gemini(request: ChatRequest):
+def chat_with_gemini(request: ChatRequest):
     """Gemini-powered chat endpoint that grounds on schemes CSV whenever needed."""
     # Load CSV
     df = _load_schemes_csv(request.csv_path)
@@ -532,70 +754,63 @@ async def chat_with_gemini(request: ChatRequest):
         "Keep responses concise and list-like with clear headings and bullet points."
     )
 
-    # Build conversation text for Gemini
-    convo_text = [f"System: {sys_instructions}"]
-    if request.name:
-        convo_text.append(f"System: User name is {request.name}.")
-    if request.age is not None:
-        convo_text.append(f"System: User age is {request.age}.")
-    if request.sector:
-        convo_text.append(f"System: User sector is {request.sector}.")
-    if request.income_level:
-        convo_text.append(f"System: User income level is {request.income_level}.")
-    if request.state:
-        convo_text.append(f"System: User state is {request.state}.")
-
-    for m in request.messages:
-        role = "User" if m.role == "user" else ("Assistant" if m.role == "assistant" else "System")
-        convo_text.append(f"{role}: {m.content}")
-
-    convo_text.append("\nContext from CSV (use strictly):\n" + context_block)
-    prompt = "\n\n".join(convo_text)
+    # Build conversation text for Gemini; filter(None, ...) drops the
+    # user-detail lines whose field was not provided
+    prompt = "\n\n".join(filter(None, [
+        f"System: {sys_instructions}",
+        f"System: User name is {request.name}." if request.name else None,
+        f"System: User age is {request.age}." if request.age is not None else None,
+        f"System: User sector is {request.sector}." if request.sector else None,
+        f"System: User income level is {request.income_level}." if request.income_level else None,
+        f"System: User state is {request.state}." if request.state else None,
+        *(f"{_ROLE_MAP.get(m.role, 'System')}: {m.content}" for m in request.messages),
+        "\nContext from CSV (use strictly):\n" + context_block,
+    ]))
+
+    # Recommended list for the UI, built once whichever branch replies
+    recommended = _recommended_list(candidates)
 
     # Call Gemini
     api_key = os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY')
     if not api_key:
         # Fallback: return extractive summary from context
         fallback = "Could not access Gemini. Here are some schemes from the dataset you may review:\n\n" + context_block
-        # Prepare recommended list
-        recs: List[Dict[str, Any]] = []
-        for _, r in candidates.iterrows():
-            recs.append({
-                "scheme_name": r.get('scheme_name', ''),
-                "state": r.get('state', ''),
-                "category": r.get('schemeCategory', ''),
-                "eligibility": r.get('eligibility', ''),
-                "benefits": r.get('benefits', ''),
-                "application": r.get('application', '') or r.get('official_url', ''),
-            })
-        return ChatResponse(reply=fallback, recommended=recs)
+        return ChatResponse(reply=fallback, recommended=recommended)
 
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        resp = model.generate_content(prompt)
-        text = resp.text if hasattr(resp, 'text') else str(resp)
+        text = _gemini(prompt)
     except Exception as e:
         # Fallback on error
         text = f"Gemini error: {e}.\n\nHere are some schemes based on your info:\n\n{context_block}"
 
-    # Prepare recommended list from candidates for UI to render
-    recommended: List[Dict[str, Any]] = []
-    for _, r in candidates.iterrows():
-        recommended.append({
-            "scheme_name": r.get('scheme_name', ''),
-            "state": r.get('state', ''),
-            "category": r.get('schemeCategory', ''),
-            "eligibility": r.get('eligibility', ''),
-            "benefits": r.get('benefits', ''),
-            "application": r.get('application', '') or r.get('official_url', ''),
+    return ChatResponse(reply=text, recommended=recommended)
+def _format_query_results(results: List[tuple]) -> List[dict]:
+    """Format (score, text, meta) search hits into the API result shape."""
+    formatted_results = []
+    for i, (score, text, meta) in enumerate(results):
+        # Structured metadata carries the scheme name; fall back to parsing
+        # the chunk text for indexes built before it was stored
+        scheme_name = meta.get("scheme_name") or "Unknown Scheme"
+        if scheme_name == "Unknown Scheme" and "Scheme:" in text:
+            try:
+                scheme_part = text.split("Scheme:")[1].split("|")[0].strip()
+                scheme_name = scheme_part[:100] + "..." if len(scheme_part) > 100 else scheme_part
+            except:
+                pass
+
+        formatted_results.append({
+            "rank": i + 1,
+            "score": score,
+            "similarity": f"{score:.4f}",
+            "scheme_name": scheme_name,
+            "content": text,
+            "preview": text[:200] + "..." if len(text) > 200 else text
         })
+    return formatted_results
 
-    return ChatResponse(reply=text, recommended=recommended)
-@router.post("/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
-    """Query the FAISS index for similar documents."""
+@router.post("/query", response_model=Union[QueryResponse, BatchQueryResponse])
+def query_documents(request: QueryRequest):
+    """Query the FAISS index for similar documents (single query or batch)."""
     try:
         # Check if index exists
         if faiss_handler.index is None:
@@ -605,40 +820,38 @@ async def query_documents(request: QueryRequest):
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="No FAISS index found. Please ingest data first using /ingest endpoint."
                 )
-        
+
+        # Batch mode: embed all queries together, search in one FAISS call
+        if request.queries:
+            batch_embeddings = embedding_service.embed_queries(request.queries)
+            batch_results = faiss_handler.search_batch(batch_embeddings, request.k)
+            return BatchQueryResponse(responses=[
+                QueryResponse(
+                    results=_format_query_results(results),
+                    query=query,
+                    k=request.k
+                )
+                for query, results in zip(request.queries, batch_results)
+            ])
+
+        if not request.query:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Either 'query' or 'queries' must be provided"
+            )
+
         # Generate query embedding
-        query_embedding = embedding_service.embed_query(request.query)
-        
+        query_embedding = list(_embed_query_cached(" ".join(request.query.lower().split())))
+
         # Search for similar documents
         results = faiss_handler.search(query_embedding, request.k)
-        
-        # Format results
-        formatted_results = []
-        for i, (score, text) in enumerate(results):
-            # Extract scheme name if available
-            scheme_name = "Unknown Scheme"
-            if "Scheme:" in text:
-                try:
-                    scheme_part = text.split("Scheme:")[1].split("|")[0].strip()
-                    scheme_name = scheme_part[:100] + "..." if len(scheme_part) > 100 else scheme_part
-                except:
-                    pass
-            
-            formatted_results.append({
-                "rank": i + 1,
-                "score": score,
-                "similarity": f"{score:.4f}",
-                "scheme_name": scheme_name,
-                "content": text,
-                "preview": text[:200] + "..." if len(text) > 200 else text
-            })
-        
+
         return QueryResponse(
-            results=formatted_results,
+            results=_format_query_results(results),
             query=request.query,
             k=request.k
         )
-        
+
     except HTTPException:
         raise
     except Exception as e:
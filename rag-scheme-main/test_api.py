@@ -3,18 +3,28 @@ Test script for the Government Scheme RAG API.
 Demonstrates how to use the API endpoints.
 """
 
+import asyncio
 import requests
 import json
 import time
 
+try:
+    import httpx
+except ImportError:  # optional: enables concurrent query testing
+    httpx = None
+
 # API base URL
 BASE_URL = "http://localhost:8000"
 
+# One session for the whole run: keep-alive reuses the TCP connection
+# instead of paying a handshake per request
+SESSION = requests.Session()
+
 def test_health():
     """Test health endpoint."""
     print("Testing health endpoint...")
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = SESSION.get(f"{BASE_URL}/health")
         print(f"Status: {response.status_code}")
         print(f"Response: {json.dumps(response.json(), indent=2)}")
         return response.status_code == 200
@@ -30,7 +40,7 @@ def test_ingest():
             "csv_path": "updated_data.csv",
             "force_rebuild": True
         }
-        response = requests.post(f"{BASE_URL}/ingest", json=payload)
+        response = SESSION.post(f"{BASE_URL}/ingest", json=payload)
         print(f"Status: {response.status_code}")
         print(f"Response: {json.dumps(response.json(), indent=2)}")
         return response.status_code == 200
@@ -46,7 +56,7 @@ def test_query(question: str, k: int = 3):
             "question": question,
             "k": k
         }
-        response = requests.post(f"{BASE_URL}/query", json=payload)
+        response = SESSION.post(f"{BASE_URL}/query", json=payload)
         print(f"Status: {response.status_code}")
         
         if response.status_code == 200:
@@ -70,7 +80,7 @@ def test_stats():
     """Test stats endpoint."""
     print("\nTesting stats endpoint...")
     try:
-        response = requests.get(f"{BASE_URL}/stats")
+        response = SESSION.get(f"{BASE_URL}/stats")
         print(f"Status: {response.status_code}")
         print(f"Response: {json.dumps(response.json(), indent=2)}")
         return response.status_code == 200
@@ -78,6 +88,28 @@ def test_stats():
         print(f"Error: {e}")
         return False
 
+async def test_queries_async(questions, k: int = 2):
+    """Fire all test queries concurrently with httpx + asyncio.gather."""
+    async with httpx.AsyncClient(base_url=BASE_URL, timeout=60.0) as client:
+        responses = await asyncio.gather(
+            *[client.post("/query", json={"question": q, "k": k}) for q in questions],
+            return_exceptions=True,
+        )
+    for question, response in zip(questions, responses):
+        print(f"\nTesting query: '{question}'")
+        if isinstance(response, Exception):
+            print(f"Error: {response}")
+            continue
+        print(f"Status: {response.status_code}")
+        if response.status_code == 200:
+            data = response.json()
+            print(f"Found {data['total_matches']} matches:")
+            for i, match in enumerate(data['matches'], 1):
+                print(f"  {i}. {match.get('scheme', match.get('scheme_name', ''))}")
+        else:
+            print(f"Error: {response.text}")
+        print("-" * 30)
+
 def main():
     """Run all tests."""
     print("Government Scheme RAG API Test Suite")
@@ -108,9 +140,13 @@ def main():
         "startup funding programs"
     ]
     
-    for query in test_queries:
-        test_query(query, k=2)
-        print("-" * 30)
+    if httpx is not None:
+        # Concurrent queries exercise the server's batching/threadpool path
+        asyncio.run(test_queries_async(test_queries, k=2))
+    else:
+        for query in test_queries:
+            test_query(query, k=2)
+            print("-" * 30)
     
     # Test stats
     print("\n" + "=" * 50)
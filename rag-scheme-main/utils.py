@@ -5,9 +5,58 @@ Handles parsing of updated_data.csv and creates structured documents for RAG.
 
 import pandas as pd
 import os
+import re
+import sys
 from typing import List, Dict, Any, Tuple
 import logging
 
+from utils.scheme_text import build_scheme_text
+
+# (column, label) pairs driving document assembly, in render order; this
+# module works on the standardized names produced by _map_columns
+FIELDS = [
+    ('scheme_name', 'Scheme'),
+    ('details', 'Description'),
+    ('benefits', 'Benefits'),
+    ('eligibility', 'Eligibility'),
+    ('application', 'Application Process'),
+    ('documents', 'Required Documents'),
+    ('scheme_category', 'Category'),
+    ('level', 'Level'),
+    ('tags', 'Tags'),
+]
+
+# Metadata column -> value used when the column is missing entirely
+META_DEFAULTS = {
+    'scheme_name': 'Unknown',
+    'scheme_category': 'Unknown',
+    'state': 'All India',
+    'eligibility': 'Not specified',
+    'benefits': 'Not specified',
+    'official_url': 'Not available',
+    'level': 'Unknown',
+    'tags': '',
+}
+
+# Standardized column name -> compiled alternation over its aliases;
+# compiled once so _map_columns does a single regex scan per column
+_COLUMN_PATTERNS = [
+    (standard, re.compile("|".join(map(re.escape, aliases))))
+    for standard, aliases in [
+        ('scheme_name', ['scheme_name', 'schemename', 'scheme name', 'name']),
+        ('details', ['details', 'description', 'desc', 'about']),
+        ('benefits', ['benefits', 'benefit', 'financial_assistance', 'assistance']),
+        ('eligibility', ['eligibility', 'eligibilitycriteria', 'criteria', 'who_can_apply']),
+        ('application', ['application', 'how_to_apply', 'process', 'steps']),
+        ('documents', ['documents', 'required_documents', 'docs']),
+        ('level', ['level', 'government_level', 'state_central']),
+        ('scheme_category', ['schemecategory', 'category', 'sector', 'domain']),
+        ('tags', ['tags', 'tag', 'keywords']),
+        ('state', ['state', 'region', 'location']),
+        ('official_url', ['officialurl', 'url', 'link', 'website']),
+    ]
+]
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -40,6 +89,12 @@ class SchemeDocumentProcessor:
             df = pd.read_csv(self.csv_path)
             logger.info(f"Loaded CSV with {len(df)} rows and {len(df.columns)} columns")
             logger.info(f"Columns: {list(df.columns)}")
+
+            # Strip stray quotes and whitespace once per object column here,
+            # so downstream code never re-cleans individual cells
+            obj_cols = df.select_dtypes('object').columns
+            df[obj_cols] = df[obj_cols].apply(
+                lambda s: s.str.replace('"', '', regex=False).str.strip())
             
             # Map column names to expected format (case-insensitive)
             column_mapping = self._map_columns(df.columns)
@@ -69,28 +124,16 @@ class SchemeDocumentProcessor:
             Dict mapping original names to standardized names
         """
         column_mapping = {}
-        
-        # Define mapping patterns (case-insensitive)
-        mappings = {
-            'scheme_name': ['scheme_name', 'schemename', 'scheme name', 'name'],
-            'details': ['details', 'description', 'desc', 'about'],
-            'benefits': ['benefits', 'benefit', 'financial_assistance', 'assistance'],
-            'eligibility': ['eligibility', 'eligibilitycriteria', 'criteria', 'who_can_apply'],
-            'application': ['application', 'how_to_apply', 'process', 'steps'],
-            'documents': ['documents', 'required_documents', 'docs'],
-            'level': ['level', 'government_level', 'state_central'],
-            'scheme_category': ['schemeCategory', 'category', 'sector', 'domain'],
-            'tags': ['tags', 'tag', 'keywords'],
-            'state': ['state', 'region', 'location'],
-            'official_url': ['officialurl', 'url', 'link', 'website']
-        }
-        
-        for standard_name, patterns in mappings.items():
-            for col in columns:
-                if any(pattern.lower() in col.lower() for pattern in patterns):
+
+        # Lowercase each column once; the compiled alternations do the rest
+        lowered = [(col, col.lower()) for col in columns]
+
+        for standard_name, pattern in _COLUMN_PATTERNS:
+            for col, col_l in lowered:
+                if pattern.search(col_l):
                     column_mapping[col] = standard_name
                     break
-        
+
         return column_mapping
     
     def create_documents(self, df: pd.DataFrame) -> Tuple[List[str], List[Dict[str, Any]]]:
@@ -105,93 +148,84 @@ class SchemeDocumentProcessor:
         """
         documents = []
         metadata_list = []
-        
-        for idx, row in df.iterrows():
-            try:
-                # Create document text by combining key fields
-                doc_parts = []
-                
-                # Add scheme name
-                if 'scheme_name' in row and pd.notna(row['scheme_name']):
-                    scheme_name = str(row['scheme_name']).strip().replace('"', '')
-                    doc_parts.append(f"Scheme: {scheme_name}")
-                
-                # Add details/description
-                if 'details' in row and pd.notna(row['details']):
-                    details = str(row['details']).strip().replace('"', '')
-                    doc_parts.append(f"Description: {details}")
-                
-                # Add benefits
-                if 'benefits' in row and pd.notna(row['benefits']):
-                    benefits = str(row['benefits']).strip().replace('"', '')
-                    doc_parts.append(f"Benefits: {benefits}")
-                
-                # Add eligibility criteria
-                if 'eligibility' in row and pd.notna(row['eligibility']):
-                    eligibility = str(row['eligibility']).strip().replace('"', '')
-                    doc_parts.append(f"Eligibility: {eligibility}")
-                
-                # Add application process
-                if 'application' in row and pd.notna(row['application']):
-                    application = str(row['application']).strip().replace('"', '')
-                    doc_parts.append(f"Application Process: {application}")
-                
-                # Add required documents
-                if 'documents' in row and pd.notna(row['documents']):
-                    documents_req = str(row['documents']).strip().replace('"', '')
-                    doc_parts.append(f"Required Documents: {documents_req}")
-                
-                # Add category/sector
-                if 'scheme_category' in row and pd.notna(row['scheme_category']):
-                    category = str(row['scheme_category']).strip().replace('"', '')
-                    doc_parts.append(f"Category: {category}")
-                
-                # Add level (State/Central)
-                if 'level' in row and pd.notna(row['level']):
-                    level = str(row['level']).strip().replace('"', '')
-                    doc_parts.append(f"Level: {level}")
-                
-                # Add tags
-                if 'tags' in row and pd.notna(row['tags']):
-                    tags = str(row['tags']).strip().replace('"', '')
-                    doc_parts.append(f"Tags: {tags}")
-                
-                # Create the document text
-                document_text = " | ".join(doc_parts)
-                
-                if document_text.strip():
-                    documents.append(document_text)
-                    
-                    # Create metadata
-                    metadata = {
-                        'scheme_name': str(row.get('scheme_name', 'Unknown')).replace('"', '').strip(),
-                        'sector': str(row.get('scheme_category', 'Unknown')).replace('"', '').strip(),
-                        'state': str(row.get('state', 'All India')).replace('"', '').strip(),
-                        'eligibility': str(row.get('eligibility', 'Not specified')).replace('"', '').strip(),
-                        'benefits': str(row.get('benefits', 'Not specified')).replace('"', '').strip(),
-                        'official_url': str(row.get('official_url', 'Not available')).replace('"', '').strip(),
-                        'level': str(row.get('level', 'Unknown')).replace('"', '').strip(),
-                        'tags': str(row.get('tags', '')).replace('"', '').strip(),
-                        'row_index': idx
-                    }
-                    metadata_list.append(metadata)
-                    
-            except Exception as e:
-                logger.warning(f"Error processing row {idx}: {str(e)}")
-                continue
-        
+
+        n = len(df)
+
+        # Document text comes from the shared vectorized kernel, driven by
+        # the module-level FIELDS layout
+        texts = build_scheme_text(df, FIELDS).tolist()
+
+        # Cells were cleaned wholesale in load_csv; stringify only
+        cleaned = {}
+        for col in META_DEFAULTS:
+            if col in df.columns:
+                cleaned[col] = df[col].astype(str).tolist()
+
+        # Low-cardinality fields repeat across thousands of rows; interning
+        # keeps one shared string object per distinct value
+        for col in ('scheme_category', 'state', 'level'):
+            if col in cleaned:
+                cleaned[col] = [sys.intern(v) for v in cleaned[col]]
+
+        meta_cols = [(col, cleaned.get(col, [default] * n))
+                     for col, default in META_DEFAULTS.items()]
+
+        for i, idx in enumerate(df.index):
+            document_text = texts[i]
+
+            if document_text.strip():
+                documents.append(document_text)
+
+                metadata = {col: values[i] for col, values in meta_cols}
+                metadata['sector'] = metadata.pop('scheme_category')
+                metadata['row_index'] = idx
+                metadata_list.append(metadata)
+
         logger.info(f"Created {len(documents)} documents from {len(df)} rows")
         return documents, metadata_list
     
+    def iter_scheme_chunks(self, chunksize: int = 50_000):
+        """
+        Stream the CSV and yield (documents, metadata_list) per chunk.
+
+        Only one chunk of rows is resident at a time, so peak memory stays
+        flat regardless of CSV size.
+
+        Args:
+            chunksize: Number of CSV rows per chunk
+
+        Yields:
+            Tuple of (documents, metadata_list) for each chunk
+        """
+        if not os.path.exists(self.csv_path):
+            raise FileNotFoundError(f"CSV file not found: {self.csv_path}")
+
+        column_mapping = None
+        for chunk in pd.read_csv(self.csv_path, chunksize=chunksize):
+            # Same per-load cleaning and column mapping as load_csv
+            obj_cols = chunk.select_dtypes('object').columns
+            chunk[obj_cols] = chunk[obj_cols].apply(
+                lambda s: s.str.replace('"', '', regex=False).str.strip())
+
+            if column_mapping is None:
+                column_mapping = self._map_columns(chunk.columns)
+            chunk = chunk.rename(columns=column_mapping)
+
+            yield self.create_documents(chunk)
+
     def process_schemes(self) -> Tuple[List[str], List[Dict[str, Any]]]:
         """
-        Complete processing pipeline: load CSV and create documents.
-        
+        Complete processing pipeline: stream the CSV and create documents.
+
         Returns:
             Tuple of (documents, metadata_list)
         """
-        df = self.load_csv()
-        return self.create_documents(df)
+        documents: List[str] = []
+        metadata_list: List[Dict[str, Any]] = []
+        for docs, metas in self.iter_scheme_chunks():
+            documents.extend(docs)
+            metadata_list.extend(metas)
+        return documents, metadata_list
     
     def get_scheme_summary(self) -> Dict[str, Any]:
         """
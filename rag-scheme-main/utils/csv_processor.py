@@ -1,22 +1,42 @@
+import numpy as np
 import pandas as pd
-from typing import List, Tuple
-import re
+from typing import Dict, List, Tuple
+
+from utils.scheme_text import build_scheme_text
+
+try:
+    import tiktoken
+except ImportError:  # exact tokenization is optional; the heuristic still works
+    tiktoken = None
 
 class CSVProcessor:
     def __init__(self, max_tokens: int = 500):
         self.max_tokens = max_tokens
-    
+        # Cached encoder: one C-level encode + list slicing replaces the
+        # Python sentence/word loops and gives exact token counts
+        self._encoder = tiktoken.get_encoding("cl100k_base") if tiktoken else None
+
     def estimate_tokens(self, text: str) -> int:
         """Rough estimation of token count (4 characters per token average)."""
         return len(text) // 4
-    
+
     def chunk_text(self, text: str) -> List[str]:
         """Split text into chunks based on token limit."""
+        if self._encoder is not None:
+            ids = self._encoder.encode(text)
+            if len(ids) <= self.max_tokens:
+                return [text]
+            return [self._encoder.decode(ids[i:i + self.max_tokens])
+                    for i in range(0, len(ids), self.max_tokens)]
+
+        # Heuristic fallback when tiktoken is not installed
         if self.estimate_tokens(text) <= self.max_tokens:
             return [text]
         
-        # Split by sentences first
-        sentences = re.split(r'[.!?]+', text)
+        # Split by sentences first; a vectorized numpy scan over the
+        # character codes finds every terminator in one pass instead of
+        # running the regex engine over the whole document
+        sentences = self._split_sentences(text)
         chunks = []
         current_chunk = ""
         
@@ -50,113 +70,110 @@ class CSVProcessor:
         
         if current_chunk:
             chunks.append(current_chunk.strip())
-        
+
         return chunks
+
+    @staticmethod
+    def _split_sentences(text: str) -> List[str]:
+        """Sentence pieces between '.', '!' and '?' boundaries.
+
+        utf-32 codes give one array slot per character, so the offsets
+        index straight back into the original string; runs of terminators
+        yield empty pieces that the caller already skips.
+        """
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        boundaries = np.flatnonzero(
+            (codes == ord('.')) | (codes == ord('!')) | (codes == ord('?')))
+        starts = np.concatenate(([0], boundaries + 1))
+        ends = np.concatenate((boundaries, [len(codes)]))
+        return [text[s:e] for s, e in zip(starts, ends)]
     
-    def process_csv(self, csv_path: str, text_column: str = "text") -> Tuple[List[str], List[str]]:
-        """Process CSV file and return chunked texts and their sources."""
+    def process_csv(self, csv_path: str, text_column: str = "text") -> Tuple[List[str], List[Dict[str, str]]]:
+        """Process CSV file and return chunked texts with per-chunk metadata.
+
+        Each metadata dict carries 'source', 'scheme_name', 'state' and
+        'application' so consumers can read these fields directly instead of
+        re-parsing them out of the chunk text.
+        """
         try:
-            df = pd.read_csv(csv_path)
-            
-            # For scheme data, combine multiple relevant columns for better search
-            if "scheme_name" in df.columns and "details" in df.columns:
-                # This is scheme data - combine multiple columns
-                all_chunks = []
-                all_sources = []
-                
-                for idx, row in df.iterrows():
-                    # Combine relevant columns for comprehensive search
-                    combined_text = self._combine_scheme_columns(row)
-                    
-                    if not combined_text.strip():
-                        continue
-                    
-                    chunks = self.chunk_text(combined_text)
-                    all_chunks.extend(chunks)
-                    
-                    # Create source identifier with scheme name
-                    scheme_name = str(row.get('scheme_name', f'row_{idx}')).replace('"', '').strip()
-                    source = f"{scheme_name}_row_{idx}"
-                    all_sources.extend([source] * len(chunks))
-                
-                return all_chunks, all_sources
-            
-            else:
-                # Standard processing for other CSV files
-                if text_column not in df.columns:
-                    raise ValueError(f"Column '{text_column}' not found in CSV. Available columns: {list(df.columns)}")
-                
-                all_chunks = []
-                all_sources = []
-                
-                for idx, row in df.iterrows():
-                    text = str(row[text_column])
-                    if pd.isna(text) or text.strip() == "":
-                        continue
-                    
-                    chunks = self.chunk_text(text)
-                    all_chunks.extend(chunks)
-                    
-                    # Create source identifier
-                    source = f"row_{idx}"
-                    all_sources.extend([source] * len(chunks))
-                
-                return all_chunks, all_sources
-            
+            all_chunks: List[str] = []
+            all_metadatas: List[Dict[str, str]] = []
+            # Stream the file so only `chunksize` rows are resident at once
+            for df in pd.read_csv(csv_path, chunksize=50_000):
+                chunks, metadatas = self._process_frame(df, text_column)
+                all_chunks.extend(chunks)
+                all_metadatas.extend(metadatas)
+            return all_chunks, all_metadatas
+
         except Exception as e:
             raise Exception(f"Error processing CSV file: {str(e)}")
-    
-    def _combine_scheme_columns(self, row) -> str:
-        """Combine multiple columns from scheme data for comprehensive search."""
-        combined_parts = []
-        
-        # Add scheme name
-        if 'scheme_name' in row and pd.notna(row['scheme_name']):
-            scheme_name = str(row['scheme_name']).replace('"', '').strip()
-            combined_parts.append(f"Scheme: {scheme_name}")
-        
-        # Add details (main content)
-        if 'details' in row and pd.notna(row['details']):
-            details = str(row['details']).replace('"', '').strip()
-            combined_parts.append(f"Details: {details}")
-        
-        # Add benefits
-        if 'benefits' in row and pd.notna(row['benefits']):
-            benefits = str(row['benefits']).replace('"', '').strip()
-            combined_parts.append(f"Benefits: {benefits}")
-        
-        # Add eligibility
-        if 'eligibility' in row and pd.notna(row['eligibility']):
-            eligibility = str(row['eligibility']).replace('"', '').strip()
-            combined_parts.append(f"Eligibility: {eligibility}")
-        
-        # Add application process
-        if 'application' in row and pd.notna(row['application']):
-            application = str(row['application']).replace('"', '').strip()
-            combined_parts.append(f"Application Process: {application}")
-        
-        # Add required documents
-        if 'documents' in row and pd.notna(row['documents']):
-            documents = str(row['documents']).replace('"', '').strip()
-            combined_parts.append(f"Required Documents: {documents}")
-        
-        # Add scheme category
-        if 'schemeCategory' in row and pd.notna(row['schemeCategory']):
-            category = str(row['schemeCategory']).replace('"', '').strip()
-            combined_parts.append(f"Category: {category}")
-        
-        # Add level (State/Central)
-        if 'level' in row and pd.notna(row['level']):
-            level = str(row['level']).replace('"', '').strip()
-            combined_parts.append(f"Level: {level}")
-        
-        # Add tags
-        if 'tags' in row and pd.notna(row['tags']):
-            tags = str(row['tags']).replace('"', '').strip()
-            combined_parts.append(f"Tags: {tags}")
-        
-        return " | ".join(combined_parts)
-    
+
+    def _process_frame(self, df: pd.DataFrame, text_column: str) -> Tuple[List[str], List[Dict[str, str]]]:
+        """Chunk one DataFrame of CSV rows and build its metadata."""
+        # For scheme data, combine multiple relevant columns for better search
+        if "scheme_name" in df.columns and "details" in df.columns:
+            # This is scheme data; the shared vectorized kernel builds
+            # the combined text for every row at once
+            all_chunks = []
+            all_metadatas = []
+
+            texts = build_scheme_text(df).tolist()
+
+            def clean_col(col: str) -> List[str]:
+                if col not in df.columns:
+                    return [""] * len(df)
+                return (df[col].astype(str)
+                        .str.replace('"', '', regex=False).str.strip()
+                        .where(df[col].notna(), '').tolist())
+
+            names = (df['scheme_name'].astype(str)
+                     .str.replace('"', '', regex=False).str.strip().tolist())
+            states = clean_col('state')
+            applications = clean_col('application')
+
+            for i, idx in enumerate(df.index):
+                combined_text = texts[i]
+
+                if not combined_text.strip():
+                    continue
+
+                chunks = self.chunk_text(combined_text)
+                all_chunks.extend(chunks)
+
+                # Structured metadata shared by all chunks of this row
+                meta = {
+                    "source": f"{names[i]}_row_{idx}",
+                    "scheme_name": names[i],
+                    "state": states[i],
+                    "application": applications[i],
+                }
+                all_metadatas.extend([meta] * len(chunks))
+
+            return all_chunks, all_metadatas
+
+        else:
+            # Standard processing for other CSV files
+            if text_column not in df.columns:
+                raise ValueError(f"Column '{text_column}' not found in CSV. Available columns: {list(df.columns)}")
+
+            all_chunks = []
+            all_metadatas = []
+
+            for idx, row in df.iterrows():
+                text = str(row[text_column])
+                if pd.isna(text) or text.strip() == "":
+                    continue
+
+                chunks = self.chunk_text(text)
+                all_chunks.extend(chunks)
+
+                meta = {"source": f"row_{idx}", "scheme_name": "",
+                        "state": "", "application": ""}
+                all_metadatas.extend([meta] * len(chunks))
+
+            return all_chunks, all_metadatas
+
+
     def validate_csv(self, csv_path: str, text_column: str = "text") -> bool:
         """Validate that CSV file exists and has the required column."""
         try:
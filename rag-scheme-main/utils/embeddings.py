@@ -1,5 +1,7 @@
 import os
-from typing import List
+from functools import lru_cache
+from typing import Dict, List
+import numpy as np
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from dotenv import load_dotenv
 
@@ -10,24 +12,60 @@ class EmbeddingService:
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        
+
         self.embeddings = GoogleGenerativeAIEmbeddings(
             model="models/embedding-001",
             google_api_key=api_key
         )
-    
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts."""
+        # Per-instance LRU: repeated queries skip the 200-500ms API round-trip
+        self._embed_query_cached = lru_cache(maxsize=4096)(self._embed_query_uncached)
+
+    @staticmethod
+    def _l2_normalize(arr: np.ndarray) -> np.ndarray:
+        """In-place row-wise L2 normalization of a float32 matrix."""
+        norms = np.linalg.norm(arr, axis=1, keepdims=True)
+        np.maximum(norms, 1e-12, out=norms)
+        arr /= norms
+        return arr
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Generate embeddings as an L2-normalized float32 (N, d) array.
+
+        Returning a pre-normalized ndarray means downstream FAISS code can
+        ingest the matrix without re-boxing or re-normalizing it.
+        """
         try:
-            embeddings = self.embeddings.embed_documents(texts)
-            return embeddings
+            return self._l2_normalize(
+                np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32))
         except Exception as e:
             raise Exception(f"Error generating embeddings: {str(e)}")
-    
+
+    def _embed_query_uncached(self, query: str) -> tuple:
+        """API round-trip for a single query; tuple result so it is cacheable."""
+        return tuple(self.embeddings.embed_query(query))
+
     def embed_query(self, query: str) -> List[float]:
-        """Generate embedding for a single query."""
+        """Generate embedding for a single query (cached per query string)."""
         try:
-            embedding = self.embeddings.embed_query(query)
-            return embedding
+            return list(self._embed_query_cached(query))
         except Exception as e:
             raise Exception(f"Error generating query embedding: {str(e)}")
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed several queries in one batched embed_documents call.
+
+        Returns an L2-normalized float32 (N, d) array like embed_texts.
+        Embeds with the query task type so batch results match what
+        embed_query returns for the same text.
+        """
+        try:
+            return self._l2_normalize(
+                np.asarray(self.embeddings.embed_documents(
+                    queries, task_type="RETRIEVAL_QUERY"), dtype=np.float32))
+        except Exception as e:
+            raise Exception(f"Error generating query embeddings: {str(e)}")
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters for the query-embedding cache."""
+        info = self._embed_query_cached.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize}
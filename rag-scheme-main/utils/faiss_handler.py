@@ -1,39 +1,115 @@
+import hashlib
 import os
 import pickle
 import numpy as np
 import faiss
+import pyarrow as pa
+import pyarrow.parquet as pq
 from typing import List, Tuple, Optional
 from pathlib import Path
 
 class FAISSHandler:
-    def __init__(self, index_path: str = "faiss_index"):
+    # Product quantization stores 16 bytes per vector instead of d*4, which
+    # cuts RAM ~48x for 768-dim embeddings and speeds up the memory-bound
+    # scan at the cost of a small recall drop
+    QUANTIZED_FACTORY = "IVF100,PQ16x8"
+
+    def __init__(self, index_path: str = "faiss_index",
+                 index_factory: Optional[str] = None, quantize: bool = False):
         self.index_path = Path(index_path)
         self.index = None
         self.metadata = []
+        self.doc_meta = []  # per-vector structured fields, parallel to metadata
         self.dimension = None
-        
+        # Normalized vectors kept as fp16 so a rebuild from the same CSV can
+        # skip the embedding API entirely
+        self.embeddings_f16 = None
+        self.source_hash = None
+        # ANN index layout; HNSW32 gives sub-linear search with near-flat
+        # recall, "Flat" restores the old brute-force behaviour
+        self.index_factory = (index_factory
+                              or os.getenv("FAISS_INDEX_FACTORY")
+                              or (self.QUANTIZED_FACTORY if quantize else "HNSW32"))
+        self.nprobe = int(os.getenv("FAISS_NPROBE", "8"))
+        self.ef_search = int(os.getenv("FAISS_EF_SEARCH", "64"))
+        # One OpenMP pool for the process; set FAISS_THREADS to cores/workers
+        # when several uvicorn workers share the host
+        faiss.omp_set_num_threads(int(os.getenv("FAISS_THREADS", os.cpu_count() or 1)))
+        self._gpu_res = None
+        self._on_gpu = False
+
     def create_index(self, dimension: int):
         """Create a new FAISS index with the specified dimension."""
         self.dimension = dimension
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
+        # Inner product over normalized vectors == cosine similarity
+        self.index = faiss.index_factory(dimension, self.index_factory,
+                                         faiss.METRIC_INNER_PRODUCT)
+        self._apply_search_params()
+        self._maybe_to_gpu()
         self.metadata = []
-    
-    def add_embeddings(self, embeddings: List[List[float]], texts: List[str]):
-        """Add embeddings and their corresponding texts to the index."""
+        self.doc_meta = []
+        self.embeddings_f16 = None
+
+    def _maybe_to_gpu(self):
+        """Move the index to GPU 0 when FAISS_USE_GPU=1.
+
+        Silently stays on CPU with faiss-cpu builds or when no device is
+        usable, so the flag is safe to leave set everywhere.
+        """
+        if os.getenv("FAISS_USE_GPU") != "1" or self.index is None or self._on_gpu:
+            return
+        try:
+            self._gpu_res = faiss.StandardGpuResources()
+            self.index = faiss.index_cpu_to_gpu(self._gpu_res, 0, self.index)
+            self._on_gpu = True
+        except AttributeError:
+            pass  # faiss-cpu build: no GPU symbols
+        except Exception as e:
+            print(f"GPU index unavailable, staying on CPU: {e}")
+
+    def _apply_search_params(self):
+        """Tune the recall/latency knobs on index types that expose them."""
+        if self.index is None:
+            return
+        if hasattr(self.index, "nprobe"):
+            self.index.nprobe = self.nprobe
+        if hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = self.ef_search
+
+    def add_embeddings(self, embeddings: List[List[float]], texts: List[str],
+                       metadatas: Optional[List[dict]] = None,
+                       normalized: bool = False):
+        """Add embeddings, their texts and optional structured metadata.
+
+        Pass normalized=True when the caller already L2-normalized the
+        matrix (EmbeddingService does) to skip the redundant pass.
+        """
         if self.index is None:
             raise ValueError("Index not initialized. Call create_index first.")
         
-        # Convert to numpy array and normalize for cosine similarity
-        embeddings_array = np.array(embeddings, dtype=np.float32)
-        faiss.normalize_L2(embeddings_array)
-        
+        # Convert to a contiguous float32 array (no copy when the caller
+        # already passes one) and normalize for cosine similarity
+        embeddings_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if not normalized:
+            faiss.normalize_L2(embeddings_array)
+
+        # IVF-style factories need their coarse centroids trained once
+        if not self.index.is_trained:
+            self.index.train(embeddings_array)
+
         # Add to index
         self.index.add(embeddings_array)
-        
+
+        # Keep a halved-precision copy for cheap rebuilds
+        vecs16 = embeddings_array.astype(np.float16)
+        self.embeddings_f16 = (vecs16 if self.embeddings_f16 is None
+                               else np.vstack([self.embeddings_f16, vecs16]))
+
         # Store metadata
         self.metadata.extend(texts)
-    
-    def search(self, query_embedding: List[float], k: int = 5) -> List[Tuple[float, str]]:
+        self.doc_meta.extend(metadatas if metadatas is not None else [{} for _ in texts])
+
+    def search(self, query_embedding: List[float], k: int = 5) -> List[Tuple[float, str, dict]]:
         """Search for the top-k most similar embeddings."""
         if self.index is None:
             raise ValueError("Index not initialized.")
@@ -49,10 +125,83 @@ class FAISSHandler:
         results = []
         for score, idx in zip(scores[0], indices[0]):
             if idx < len(self.metadata):
-                results.append((float(score), self.metadata[idx]))
-        
+                results.append((float(score), self.metadata[idx], self._meta_at(idx)))
+
         return results
-    
+
+    def _meta_at(self, idx: int) -> dict:
+        """Structured metadata for a vector, tolerating legacy indexes."""
+        return self.doc_meta[idx] if idx < len(self.doc_meta) else {}
+
+    def search_batch(self, query_embeddings, k: int = 5) -> List[List[Tuple[float, str, dict]]]:
+        """Search the top-k most similar embeddings for a batch of queries.
+
+        Takes a (batch, dimension) matrix and issues a single FAISS call so
+        the queries share one pass over the index.
+        """
+        if self.index is None:
+            raise ValueError("Index not initialized.")
+
+        # Convert queries to a contiguous matrix and normalize
+        query_array = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        faiss.normalize_L2(query_array)
+
+        # One batched search over all queries
+        scores, indices = self.index.search(query_array, k)
+
+        # Return per-query results with metadata
+        all_results = []
+        for row_scores, row_indices in zip(scores, indices):
+            row = []
+            for score, idx in zip(row_scores, row_indices):
+                if 0 <= idx < len(self.metadata):
+                    row.append((float(score), self.metadata[idx], self._meta_at(idx)))
+            all_results.append(row)
+
+        return all_results
+
+    def autotune(self, target_recall: float = 0.95, k: int = 5,
+                 sample: int = 256):
+        """Pick nprobe/efSearch so sampled queries reach target recall.
+
+        Uses a sample of the indexed vectors themselves as queries and a
+        temporary flat index as exact ground truth, then walks the knob
+        upward until recall@k meets the target. No-op on flat indexes
+        (already exact) and when no vectors are held in memory.
+        """
+        if self.index is None or self.embeddings_f16 is None:
+            return
+        tunable = hasattr(self.index, "nprobe") or hasattr(self.index, "hnsw")
+        if not tunable or not len(self.embeddings_f16):
+            return
+
+        vecs = self.embeddings_f16.astype(np.float32)
+        rng = np.random.default_rng(0)
+        queries = vecs[rng.choice(len(vecs), size=min(sample, len(vecs)),
+                                  replace=False)]
+
+        # Exact neighbours from a throwaway brute-force index
+        flat = faiss.IndexFlatIP(self.dimension)
+        flat.add(vecs)
+        _, truth = flat.search(queries, k)
+
+        for value in (1, 2, 4, 8, 16, 32, 64, 128, 256):
+            if hasattr(self.index, "nprobe"):
+                self.index.nprobe = value
+            if hasattr(self.index, "hnsw"):
+                self.index.hnsw.efSearch = max(value, k)
+            _, got = self.index.search(queries, k)
+            recall = np.mean([len(set(g) & set(t))
+                              for g, t in zip(got, truth)]) / k
+            if recall >= target_recall:
+                break
+
+        # Remember the winners so save/load round-trips them
+        if hasattr(self.index, "nprobe"):
+            self.nprobe = int(self.index.nprobe)
+        if hasattr(self.index, "hnsw"):
+            self.ef_search = int(self.index.hnsw.efSearch)
+
     def save_index(self):
         """Save the FAISS index and metadata to disk."""
         if self.index is None:
@@ -61,39 +210,115 @@ class FAISSHandler:
         # Create directory if it doesn't exist
         self.index_path.mkdir(parents=True, exist_ok=True)
         
-        # Save FAISS index
-        faiss.write_index(self.index, str(self.index_path / "index.faiss"))
-        
-        # Save metadata
-        with open(self.index_path / "metadata.pkl", "wb") as f:
-            pickle.dump(self.metadata, f)
+        # Save FAISS index (GPU indexes must be copied back for write_index)
+        index = faiss.index_gpu_to_cpu(self.index) if self._on_gpu else self.index
+        faiss.write_index(index, str(self.index_path / "index.faiss"))
         
+        # Save texts + structured metadata as one zstd-compressed Parquet
+        # file; columnar string buffers beat unpickling N Python objects
+        cols = {"text": pa.array(self.metadata, type=pa.string())}
+        if any(self.doc_meta):
+            keys = sorted({k for m in self.doc_meta for k in m})
+            for key in keys:
+                cols[key] = pa.array([str(m.get(key, "")) for m in self.doc_meta],
+                                     type=pa.string())
+        pq.write_table(pa.table(cols), self.index_path / "meta.parquet",
+                       compression="zstd")
+
         # Save dimension info
         with open(self.index_path / "dimension.txt", "w") as f:
             f.write(str(self.dimension))
+
+        # Save the (possibly autotuned) search knobs alongside the index
+        with open(self.index_path / "search_params.txt", "w") as f:
+            f.write(f"nprobe={self.nprobe}\nef_search={self.ef_search}\n")
+
+        # Save fp16 vectors + source fingerprint for embed-free rebuilds
+        if self.embeddings_f16 is not None:
+            np.save(self.index_path / "vecs.f16.npy", self.embeddings_f16)
+        if self.source_hash:
+            with open(self.index_path / "source_hash.txt", "w") as f:
+                f.write(self.source_hash)
+
+    @staticmethod
+    def file_sha256(path: str) -> str:
+        """SHA-256 of a file's contents, read in 1MB blocks."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def load_cached_embeddings(self, source_hash: str) -> Optional[np.ndarray]:
+        """Saved vectors as float32, or None if the source CSV changed."""
+        vec_file = self.index_path / "vecs.f16.npy"
+        hash_file = self.index_path / "source_hash.txt"
+        try:
+            if (vec_file.exists() and hash_file.exists()
+                    and hash_file.read_text().strip() == source_hash):
+                return np.load(vec_file).astype(np.float32)
+        except Exception as e:
+            print(f"Error loading cached embeddings: {e}")
+        return None
     
     def load_index(self) -> bool:
         """Load the FAISS index and metadata from disk."""
         try:
-            # Check if files exist
+            # Check if files exist (Parquet preferred, pickle legacy)
             index_file = self.index_path / "index.faiss"
+            meta_file = self.index_path / "meta.parquet"
             metadata_file = self.index_path / "metadata.pkl"
             dimension_file = self.index_path / "dimension.txt"
-            
-            if not all([index_file.exists(), metadata_file.exists(), dimension_file.exists()]):
+
+            if not all([index_file.exists(), dimension_file.exists(),
+                        meta_file.exists() or metadata_file.exists()]):
                 return False
             
             # Load dimension
             with open(dimension_file, "r") as f:
                 self.dimension = int(f.read().strip())
             
-            # Load FAISS index
-            self.index = faiss.read_index(str(index_file))
-            
-            # Load metadata
-            with open(metadata_file, "rb") as f:
-                self.metadata = pickle.load(f)
+            # Load FAISS index; mmap shares pages across workers and defers
+            # reads until vectors are touched, with a full read as fallback
+            try:
+                self.index = faiss.read_index(
+                    str(index_file), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except Exception:
+                self.index = faiss.read_index(str(index_file))
+
+            # Restore tuned knobs saved with the index; env vars and older
+            # indexes without the sidecar keep the constructor defaults
+            params_file = self.index_path / "search_params.txt"
+            if params_file.exists():
+                for line in params_file.read_text().splitlines():
+                    key, _, value = line.partition("=")
+                    if key == "nprobe" and value.isdigit():
+                        self.nprobe = int(value)
+                    elif key == "ef_search" and value.isdigit():
+                        self.ef_search = int(value)
+            self._apply_search_params()
+            self._on_gpu = False
+            self._maybe_to_gpu()
             
+            # Load metadata (Parquet preferred, pickle legacy)
+            if meta_file.exists():
+                table = pq.read_table(meta_file, memory_map=True)
+                self.metadata = table.column("text").to_pylist()
+                extra = table.drop(["text"])
+                self.doc_meta = (extra.to_pylist() if extra.num_columns
+                                 else [{} for _ in self.metadata])
+            else:
+                with open(metadata_file, "rb") as f:
+                    self.metadata = pickle.load(f)
+
+                # Structured metadata; older indexes predate the file
+                doc_meta_file = self.index_path / "doc_meta.pkl"
+                if doc_meta_file.exists():
+                    with open(doc_meta_file, "rb") as f:
+                        self.doc_meta = pickle.load(f)
+                else:
+                    self.doc_meta = [{} for _ in self.metadata]
+
             return True
             
         except Exception as e:
@@ -0,0 +1,47 @@
+"""Shared builder for the per-row scheme document text.
+
+Both SchemeDocumentProcessor and CSVProcessor used to assemble the same
+"Label: value | Label: value" strings with their own per-cell loops; this
+module cleans each column once with vectorized pandas .str operations and
+hands both callers the finished text.
+"""
+
+import pandas as pd
+from typing import List, Tuple
+
+# (column, label) pairs rendered in order. Callers with a different CSV
+# layout pass their own list.
+DEFAULT_FIELDS: List[Tuple[str, str]] = [
+    ('scheme_name', 'Scheme'),
+    ('details', 'Details'),
+    ('benefits', 'Benefits'),
+    ('eligibility', 'Eligibility'),
+    ('application', 'Application Process'),
+    ('documents', 'Required Documents'),
+    ('schemeCategory', 'Category'),
+    ('level', 'Level'),
+    ('tags', 'Tags'),
+]
+
+def build_scheme_text(df: pd.DataFrame,
+                      fields: List[Tuple[str, str]] = DEFAULT_FIELDS) -> pd.Series:
+    """Return one " | "-joined document string per row of df.
+
+    Each present column is cleaned once (quotes stripped, whitespace
+    trimmed) with vectorized .str ops; NA cells drop their field from the
+    joined text, matching the old per-row behaviour.
+    """
+    cols = []
+    for col, label in fields:
+        if col in df.columns:
+            cleaned = (df[col].astype(str)
+                       .str.replace('"', '', regex=False)
+                       .str.strip().tolist())
+            cols.append((label, cleaned, df[col].notna().tolist()))
+
+    texts = [
+        " | ".join(f"{label}: {values[i]}"
+                   for label, values, notna in cols if notna[i])
+        for i in range(len(df))
+    ]
+    return pd.Series(texts, index=df.index, dtype=object)